@@ -0,0 +1,278 @@
+import json
+import os
+import time
+import numpy as np
+import carb
+import carb.settings
+import carb.tokens
+import omni.kit.app
+import omni.timeline
+import omni.usd
+from pxr import Gf, Sdf, UsdGeom, UsdShade
+
+from omni.iot.twinmaker.metrics import get_metrics
+from omni.iot.twinmaker.metadata import EntityMetadataCache
+from omni.iot.twinmaker.store import DataBindingStore
+from omni.iot.twinmaker.widgets import WidgetSystem
+from omni.iot.twinmaker.data_models import DataBinding
+from omni.iot.twinmaker.utils.omni_utils import create_global_config_prim
+from omni.iot.twinmaker.constants import WIDGET_KEY, ENTITY_ATTR, COMPONENT_ATTR, PROPERTY_ATTR, POLL_INTERVAL_ATTR, \
+    RULE_OP_ATTR, RULE_VAL_ATTR, MAT_COLOR_ATTR, CHANGE_MAT_PATH, BOUND_MIN, BOUND_MAX, DATA_SOURCE_SETTING, \
+    BENCHMARK_PRIM_COUNTS_SETTING, BENCHMARK_FRAMES_SETTING, \
+    BENCHMARK_WARMUP_FRAMES_SETTING, BENCHMARK_OUTPUT_PATH_SETTING, BENCHMARK_BASELINE_PATH_SETTING, \
+    BENCHMARK_TOLERANCE_SETTING, BENCHMARK_QUIT_SETTING
+
+DEFAULT_PRIM_COUNTS = [1000, 5000, 10000, 50000]
+DEFAULT_FRAMES = 600
+DEFAULT_WARMUP_FRAMES = 120
+DEFAULT_TOLERANCE = 0.1
+# Seconds to wait for a value of every data binding before measuring
+READY_TIMEOUT = 120
+TARGET_FPS = 30
+
+BENCHMARK_ROOT = '/World/Benchmark'
+BENCHMARK_WORKSPACE = 'benchmark'
+# Bound prims per simulated entity, and materials shared by the ModelShader prims
+PRIMS_PER_ENTITY = 10
+MATERIAL_COUNT = 16
+WIDGETS = ['ModelShader', 'ModelScaler', 'MotionIndicator']
+POLL_INTERVAL = 1.0
+
+# Results compared with the baseline, and whether a higher value is better
+COMPARED_RESULTS = {
+    'fps': True,
+    'frame_time_mean_ms': False,
+    'frame_time_p95_ms': False,
+    'python_update_ms_per_frame': False,
+    'api_calls_per_s': True,
+    'memory_mb': False
+}
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def _get_memory_mb():
+    if psutil is None:
+        return None
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def _create_material(stage, index):
+    material = UsdShade.Material.Define(stage, f'{BENCHMARK_ROOT}/Looks/Material_{index}')
+    shader = UsdShade.Shader.Define(stage, f'{material.GetPath()}/Shader')
+    shader.CreateInput('diffuse_tint', Sdf.ValueTypeNames.Color3f).Set(Gf.Vec3f(1.0, 1.0, 1.0))
+    shader.CreateInput('albedo_add', Sdf.ValueTypeNames.Float).Set(0.0)
+    return material
+
+
+def _get_data_binding(index, widget):
+    return DataBinding(f'benchmarkEntity{index // PRIMS_PER_ENTITY}', 'benchmark', f'{widget}{index % PRIMS_PER_ENTITY}')
+
+
+def _set_data_binding(prim, index, widget):
+    databinding = _get_data_binding(index, widget)
+    prim.CreateAttribute(ENTITY_ATTR, Sdf.ValueTypeNames.String).Set(databinding.entity_id)
+    prim.CreateAttribute(COMPONENT_ATTR, Sdf.ValueTypeNames.String).Set(databinding.component_name)
+    prim.CreateAttribute(PROPERTY_ATTR, Sdf.ValueTypeNames.String).Set(databinding.property_name)
+    prim.CreateAttribute(POLL_INTERVAL_ATTR, Sdf.ValueTypeNames.Float).Set(POLL_INTERVAL)
+    prim.CreateAttribute(WIDGET_KEY, Sdf.ValueTypeNames.String).Set(widget)
+
+
+# Author prims bound like the data binding JSON would, the widget of each prim alternating
+def build_benchmark_stage(stage, prim_count):
+    materials = [_create_material(stage, i) for i in range(MATERIAL_COUNT)]
+    for i in range(prim_count):
+        widget = WIDGETS[i % len(WIDGETS)]
+        path = f'{BENCHMARK_ROOT}/Prims/Prim_{i}'
+        cube = UsdGeom.Cube.Define(stage, path)
+        prim = cube.GetPrim()
+        _set_data_binding(prim, i, widget)
+        if widget == 'ModelShader':
+            UsdShade.MaterialBindingAPI(prim).Bind(materials[i % MATERIAL_COUNT])
+            prim.CreateAttribute(RULE_OP_ATTR, Sdf.ValueTypeNames.StringArray).Set(['<', '<', '>='])
+            prim.CreateAttribute(RULE_VAL_ATTR, Sdf.ValueTypeNames.FloatArray).Set([30, 70, 70])
+            prim.CreateAttribute(MAT_COLOR_ATTR, Sdf.ValueTypeNames.StringArray).Set(['#00FF00', 'NONE', '#FF0000'])
+            prim.CreateAttribute(CHANGE_MAT_PATH, Sdf.ValueTypeNames.StringArray).Set(['NONE', 'NONE', 'NONE'])
+        else:
+            prim.CreateAttribute(BOUND_MIN, Sdf.ValueTypeNames.Float).Set(0)
+            prim.CreateAttribute(BOUND_MAX, Sdf.ValueTypeNames.Float).Set(100)
+            UsdGeom.Xformable(prim).AddScaleOp().Set(Gf.Vec3f(1.0, 1.0, 1.0))
+            if widget == 'MotionIndicator':
+                UsdGeom.Xform.Define(stage, f'{path}/Conveyor')
+                speed = UsdShade.Shader.Define(stage, f'{path}/Conveyor/conveyor_speed')
+                speed.CreateInput('value', Sdf.ValueTypeNames.Float).Set(0.0)
+
+
+class ScaleBenchmark:
+    """
+    Run the widgets of a synthetic stage of prim_count bound prims, fed by the simulator data source,
+    and measure frame time, time spent in widget updates, data source call throughput and memory over frames.
+    """
+    def __init__(self, prim_count, frames=DEFAULT_FRAMES, warmup_frames=DEFAULT_WARMUP_FRAMES):
+        self._prim_count = prim_count
+        self._frames = frames
+        self._warmup_frames = warmup_frames
+
+    async def _wait_frames(self, count):
+        app = omni.kit.app.get_app()
+        for _ in range(count):
+            await app.next_update_async()
+
+    # Wait until every data binding has a value, so the measured frames update all the prims.
+    # Return the number of data bindings still without value after the timeout.
+    async def _wait_for_values(self, store):
+        databindings = {_get_data_binding(i, WIDGETS[i % len(WIDGETS)]) for i in range(self._prim_count)}
+        deadline = time.monotonic() + READY_TIMEOUT
+        app = omni.kit.app.get_app()
+        while True:
+            datapoints = store.get_snapshot().datapoints
+            missing = sum(1 for d in databindings if d not in datapoints)
+            if missing == 0 or time.monotonic() > deadline:
+                return missing
+            await app.next_update_async()
+
+    async def run(self):
+        carb.log_warn(f'benchmark: building stage with {self._prim_count} bound prims')
+        context = omni.usd.get_context()
+        await context.new_stage_async()
+        stage = context.get_stage()
+        UsdGeom.Xform.Define(stage, '/World')
+        create_global_config_prim('us-west-2', '', BENCHMARK_WORKSPACE)
+        setup_start = time.perf_counter()
+        build_benchmark_stage(stage, self._prim_count)
+        setup_seconds = time.perf_counter() - setup_start
+        memory_before = _get_memory_mb()
+
+        EntityMetadataCache.force_reinit()
+        store = DataBindingStore.force_reinit()
+        store.start_data_fetching()
+        await self._wait_frames(10)
+
+        timeline = omni.timeline.get_timeline_interface()
+        timeline.play()
+        WidgetSystem.get_instance().start(stage)
+        await self._wait_frames(self._warmup_frames)
+        missing_values = await self._wait_for_values(store)
+        if missing_values > 0:
+            carb.log_warn(f'benchmark: {missing_values} data bindings still without value after {READY_TIMEOUT}s')
+
+        metrics = get_metrics()
+        app = omni.kit.app.get_app()
+        update_start = metrics.get_totals('twinmaker_widget_update_seconds')[0]
+        calls_start = metrics.get_totals('twinmaker_api_call_seconds')[1]
+        frame_times = np.zeros(self._frames)
+        run_start = time.perf_counter()
+        last = run_start
+        for i in range(self._frames):
+            await app.next_update_async()
+            now = time.perf_counter()
+            frame_times[i] = now - last
+            last = now
+        elapsed = last - run_start
+        update_seconds = metrics.get_totals('twinmaker_widget_update_seconds')[0] - update_start
+        calls = metrics.get_totals('twinmaker_api_call_seconds')[1] - calls_start
+        memory_after = _get_memory_mb()
+
+        timeline.stop()
+        WidgetSystem.get_instance().stop()
+        await self._wait_frames(10)
+        store.stop_data_fetching()
+
+        result = {
+            'prim_count': self._prim_count,
+            'frames': self._frames,
+            'databindings_without_value': missing_values,
+            'setup_seconds': setup_seconds,
+            'fps': self._frames / elapsed,
+            'frame_time_mean_ms': float(frame_times.mean() * 1000),
+            'frame_time_p95_ms': float(np.percentile(frame_times, 95) * 1000),
+            'frame_time_max_ms': float(frame_times.max() * 1000),
+            'python_update_ms_per_frame': update_seconds * 1000 / self._frames,
+            'api_calls_per_s': calls / elapsed,
+            'memory_mb': memory_after,
+            'memory_delta_mb': memory_after - memory_before if memory_after is not None else None
+        }
+        carb.log_warn(f'benchmark: {json.dumps(result)}')
+        return result
+
+
+def compare_with_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Return a description of each result worse than the baseline run of the same prim count by more than tolerance"""
+    baseline_runs = {run['prim_count']: run for run in baseline.get('runs', [])}
+    regressions = []
+    for run in results['runs']:
+        baseline_run = baseline_runs.get(run['prim_count'])
+        if baseline_run is None:
+            continue
+        for name, higher_is_better in COMPARED_RESULTS.items():
+            value = run.get(name)
+            reference = baseline_run.get(name)
+            if value is None or reference is None or reference == 0:
+                continue
+            change = (value - reference) / abs(reference)
+            if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+                regressions.append(f'{run["prim_count"]} prims: {name} {value:.3f} vs baseline {reference:.3f} '
+                                   f'({change:+.1%})')
+    return regressions
+
+
+async def run_benchmarks_from_settings():
+    """
+    Run the scale benchmark for each prim count of the benchmark settings, write the results to outputPath and
+    compare them with the baseline at baselinePath. A results file can be used as the baseline of later runs.
+    """
+    settings = carb.settings.get_settings()
+    tokens = carb.tokens.get_tokens_interface()
+    prim_counts = settings.get(BENCHMARK_PRIM_COUNTS_SETTING) or DEFAULT_PRIM_COUNTS
+    frames = settings.get(BENCHMARK_FRAMES_SETTING) or DEFAULT_FRAMES
+    warmup_frames = settings.get(BENCHMARK_WARMUP_FRAMES_SETTING) or DEFAULT_WARMUP_FRAMES
+
+    # Feed the prims from the simulator. Its requests are not rate limited, see get_request_scheduler.
+    previous_settings = {path: settings.get(path) for path in (DATA_SOURCE_SETTING,)}
+    settings.set(DATA_SOURCE_SETTING, 'simulator')
+    try:
+        runs = []
+        for prim_count in prim_counts:
+            runs.append(await ScaleBenchmark(prim_count, frames, warmup_frames).run())
+    finally:
+        for path, value in previous_settings.items():
+            if value is not None:
+                settings.set(path, value)
+
+    fast_runs = [run['prim_count'] for run in runs if run['fps'] >= TARGET_FPS]
+    results = {
+        'runs': runs,
+        f'max_prims_at_{TARGET_FPS}_fps': max(fast_runs, default=0)
+    }
+    carb.log_warn(f'benchmark: {results[f"max_prims_at_{TARGET_FPS}_fps"]} bound prims at {TARGET_FPS} FPS or more')
+
+    output_path = settings.get(BENCHMARK_OUTPUT_PATH_SETTING)
+    if output_path:
+        output_path = tokens.resolve(output_path)
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        with open(output_path, 'w') as file:
+            json.dump(results, file, indent=2)
+        carb.log_warn(f'benchmark: results written to {output_path}')
+
+    baseline_path = settings.get(BENCHMARK_BASELINE_PATH_SETTING)
+    if baseline_path:
+        baseline_path = tokens.resolve(baseline_path)
+        if os.path.isfile(baseline_path):
+            with open(baseline_path) as file:
+                baseline = json.load(file)
+            regressions = compare_with_baseline(results, baseline,
+                                                settings.get(BENCHMARK_TOLERANCE_SETTING) or DEFAULT_TOLERANCE)
+            results['regressions'] = regressions
+            for regression in regressions:
+                carb.log_error(f'benchmark regression: {regression}')
+            if len(regressions) == 0:
+                carb.log_warn(f'benchmark: no regression against {baseline_path}')
+        else:
+            carb.log_warn(f'benchmark: baseline {baseline_path} not found')
+
+    if settings.get(BENCHMARK_QUIT_SETTING):
+        omni.kit.app.get_app().post_quit(1 if results.get('regressions') else 0)
+    return results
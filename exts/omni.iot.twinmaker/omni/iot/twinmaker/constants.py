@@ -2,10 +2,14 @@ REGION_ATTR = 'region'
 ASSUME_ROLE_ATTR = 'assumeRoleARN'
 DEFAULT_ASSUME_ROLE_ARN = '[ASSUME_ROLE_ARN]'
 
+FETCH_EXECUTOR_WORKERS = 4
+
 WORKSPACE_ATTR = 'workspaceId'
 ENTITY_ATTR = 'entityId'
 COMPONENT_ATTR = 'componentName'
 PROPERTY_ATTR = 'propertyName'
+POLL_INTERVAL_ATTR = 'pollInterval'
+INTERPOLATION_ATTR = 'interpolation'
 
 WIDGET_KEY = 'widget'
 
@@ -18,3 +22,45 @@ CHANGE_MAT_PATH = 'changeMaterialPath'
 BOUNDS_KEY = 'dataBounds'
 BOUND_MIN = 'minBound'
 BOUND_MAX = 'maxBound'
+
+SETTINGS_PATH = '/exts/omni.iot.twinmaker'
+PROFILING_ENABLED_SETTING = f'{SETTINGS_PATH}/profiling/enabled'
+PERSISTENT_CACHE_ENABLED_SETTING = f'{SETTINGS_PATH}/persistentCache/enabled'
+PERSISTENT_CACHE_PATH_SETTING = f'{SETTINGS_PATH}/persistentCache/path'
+PERSISTENT_CACHE_FLUSH_INTERVAL_SETTING = f'{SETTINGS_PATH}/persistentCache/flushInterval'
+HISTORY_CAPACITY_SETTING = f'{SETTINGS_PATH}/history/capacity'
+HISTORY_HORIZON_SETTING = f'{SETTINGS_PATH}/history/horizon'
+FETCH_MAX_LOOKBACK_SETTING = f'{SETTINGS_PATH}/fetch/maxLookback'
+SUBSCRIPTION_STATE_TTL_SETTING = f'{SETTINGS_PATH}/subscriptions/stateTtl'
+WIDGETS_INTERPOLATION_SETTING = f'{SETTINGS_PATH}/widgets/interpolation'
+WIDGETS_MAX_INTERPOLATION_DURATION_SETTING = f'{SETTINGS_PATH}/widgets/maxInterpolationDuration'
+POLLING_DEFAULT_INTERVAL_SETTING = f'{SETTINGS_PATH}/polling/defaultInterval'
+POLLING_MIN_INTERVAL_SETTING = f'{SETTINGS_PATH}/polling/minInterval'
+POLLING_MAX_INTERVAL_SETTING = f'{SETTINGS_PATH}/polling/maxInterval'
+POLLING_ADAPTIVE_SETTING = f'{SETTINGS_PATH}/polling/adaptive'
+DATA_SOURCE_SETTING = f'{SETTINGS_PATH}/dataSource'
+SIMULATOR_RATE_SETTING = f'{SETTINGS_PATH}/simulator/rate'
+SIMULATOR_SEED_SETTING = f'{SETTINGS_PATH}/simulator/seed'
+SIMULATOR_SIGNALS_SETTING = f'{SETTINGS_PATH}/simulator/signalsPath'
+REQUESTS_RATE_SETTING = f'{SETTINGS_PATH}/requests/rate'
+REQUESTS_BURST_SETTING = f'{SETTINGS_PATH}/requests/burst'
+REQUESTS_MAX_RETRIES_SETTING = f'{SETTINGS_PATH}/requests/maxRetries'
+REQUESTS_BASE_DELAY_SETTING = f'{SETTINGS_PATH}/requests/baseDelay'
+REQUESTS_MAX_DELAY_SETTING = f'{SETTINGS_PATH}/requests/maxDelay'
+REQUESTS_MAX_WAIT_SETTING = f'{SETTINGS_PATH}/requests/maxWait'
+CIRCUIT_FAILURE_THRESHOLD_SETTING = f'{SETTINGS_PATH}/requests/circuitFailureThreshold'
+CIRCUIT_RESET_TIMEOUT_SETTING = f'{SETTINGS_PATH}/requests/circuitResetTimeout'
+RECORDING_PATH_SETTING = f'{SETTINGS_PATH}/recording/path'
+REPLAY_PATH_SETTING = f'{SETTINGS_PATH}/replay/path'
+REPLAY_SPEED_SETTING = f'{SETTINGS_PATH}/replay/speed'
+REPLAY_LOOP_SETTING = f'{SETTINGS_PATH}/replay/loop'
+PLAYBACK_CHUNK_DURATION_SETTING = f'{SETTINGS_PATH}/playback/chunkDuration'
+PLAYBACK_LOOKAHEAD_SETTING = f'{SETTINGS_PATH}/playback/lookaheadChunks'
+BENCHMARK_ENABLED_SETTING = f'{SETTINGS_PATH}/benchmark/enabled'
+BENCHMARK_PRIM_COUNTS_SETTING = f'{SETTINGS_PATH}/benchmark/primCounts'
+BENCHMARK_FRAMES_SETTING = f'{SETTINGS_PATH}/benchmark/frames'
+BENCHMARK_WARMUP_FRAMES_SETTING = f'{SETTINGS_PATH}/benchmark/warmupFrames'
+BENCHMARK_OUTPUT_PATH_SETTING = f'{SETTINGS_PATH}/benchmark/outputPath'
+BENCHMARK_BASELINE_PATH_SETTING = f'{SETTINGS_PATH}/benchmark/baselinePath'
+BENCHMARK_TOLERANCE_SETTING = f'{SETTINGS_PATH}/benchmark/tolerance'
+BENCHMARK_QUIT_SETTING = f'{SETTINGS_PATH}/benchmark/quitOnFinish'
@@ -1,5 +1,7 @@
 import carb
 
+from omni.iot.twinmaker.utils.profiler_utils import profiled
+
 class DataPoint:
     def __init__(self, timestamp, value) -> None:
         self.timestamp = timestamp
@@ -95,6 +97,7 @@ class DataBounds:
         return self._prim_max
     
     # Normalize value between min and max to a proportional value between prim_min and prim_max
+    @profiled('TwinMaker::DataBounds.normalize')
     def normalize(self, value):
         if value >= self._data_min and value <= self._data_max:
             val_diff = value - self._data_min
@@ -0,0 +1,57 @@
+from abc import ABC, abstractmethod
+import carb.settings
+
+from omni.iot.twinmaker.constants import DATA_SOURCE_SETTING
+
+TWINMAKER_DATA_SOURCE = 'twinmaker'
+SIMULATOR_DATA_SOURCE = 'simulator'
+REPLAY_DATA_SOURCE = 'replay'
+
+
+class DataSource(ABC):
+    """
+    Source of the property data fetched by DataFetchingWorker. Times are ISO 8601 strings as used by TwinMaker,
+    data types are TwinMaker data types ('DOUBLE', 'STRING', ...) and value types TwinMaker value keys ('doubleValue', ...).
+    """
+    # Whether requests go to a service, rate limited and retried by the request scheduler of the workspace
+    remote = False
+
+    # Return the data type of every property of an entity: {componentName: {propertyName: type}}
+    @abstractmethod
+    def get_entity_property_types(self, entity_id):
+        pass
+
+    # Fetch all values of several properties of the same entity component between start_time and end_time
+    # Return the data points of each data binding, latest first, timestamped with their sample time in seconds since epoch
+    @abstractmethod
+    def get_property_values(self, data_bindings, data_types, start_time, end_time):
+        pass
+
+    # Fetch the latest value of several properties of the same entity component between start_time and end_time
+    # Return the latest data point of each data binding, None when it has no value in the window
+    def get_latest_property_values(self, data_bindings, data_types, start_time, end_time):
+        history = self.get_property_values(data_bindings, data_types, start_time, end_time)
+        return {d: points[0] if len(points) > 0 else None for d, points in history.items()}
+
+
+def get_data_source_name():
+    """Return the data source selected by the dataSource extension setting"""
+    return carb.settings.get_settings().get(DATA_SOURCE_SETTING) or TWINMAKER_DATA_SOURCE
+
+
+def create_data_source(region, role, workspace_id):
+    """Create the data source selected by the dataSource extension setting"""
+    source = get_data_source_name()
+    if source == SIMULATOR_DATA_SOURCE:
+        from omni.iot.twinmaker.simulator import SimulatorDataSource
+        carb.log_warn('using simulated property data')
+        return SimulatorDataSource.from_settings()
+    elif source == REPLAY_DATA_SOURCE:
+        from omni.iot.twinmaker.recording import ReplayDataSource
+        carb.log_warn('using replayed property data')
+        return ReplayDataSource.from_settings()
+    elif source == TWINMAKER_DATA_SOURCE:
+        from omni.iot.twinmaker.twinmaker_api import TwinMaker
+        return TwinMaker(region, role, workspace_id)
+    else:
+        raise Exception(f'Unsupported data source: {source}')
@@ -0,0 +1,74 @@
+import numpy as np
+
+
+def lttb(timestamps, values, threshold):
+    """
+    Downsample a time series to threshold samples with the largest-triangle-three-buckets algorithm,
+    which keeps the samples that contribute most to the shape of the line (peaks and dips).
+    Return the selected (timestamps, values) arrays, the first and last samples are always kept.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    size = len(timestamps)
+    if threshold >= size or threshold < 3:
+        return timestamps, values
+
+    # Bucket boundaries of the samples between the first and the last one
+    edges = np.linspace(1, size - 1, threshold - 1).astype(np.int64)
+    # Average point of each bucket, the last "bucket" is the last sample
+    sums_t = np.add.reduceat(timestamps[:size - 1], edges[:-1])
+    sums_v = np.add.reduceat(values[:size - 1], edges[:-1])
+    counts = np.diff(edges)
+    avg_t = np.append(sums_t / counts, timestamps[-1])
+    avg_v = np.append(sums_v / counts, values[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = size - 1
+    a = 0
+    # Each selection depends on the previous one, only the search within a bucket is vectorized
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        t, v = timestamps[lo:hi], values[lo:hi]
+        # Twice the area of the triangles (a, candidate, average of the next bucket)
+        areas = np.abs((timestamps[a] - avg_t[i + 1]) * (v - values[a]) -
+                       (timestamps[a] - t) * (avg_v[i + 1] - values[a]))
+        a = lo + int(np.argmax(areas))
+        selected[i + 1] = a
+    return timestamps[selected], values[selected]
+
+
+def min_max(timestamps, values, buckets):
+    """
+    Downsample a time series to the minimum and maximum sample of each of buckets equal time buckets, in time order.
+    Return the selected (timestamps, values) arrays with at most 2 * buckets samples.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    size = len(timestamps)
+    if size <= 2 * buckets or buckets < 1:
+        return timestamps, values
+
+    span = timestamps[-1] - timestamps[0]
+    if span <= 0:
+        return timestamps[[0, -1]], values[[0, -1]]
+    bucket_ids = np.minimum(((timestamps - timestamps[0]) / span * buckets).astype(np.int64), buckets - 1)
+    starts = np.flatnonzero(np.diff(bucket_ids, prepend=-1))
+    ends = np.append(starts[1:], size)
+
+    # Index of the min and max of each non empty bucket
+    order = np.lexsort((values, bucket_ids))
+    min_indices = order[starts]
+    max_indices = order[ends - 1]
+    selected = np.unique(np.concatenate((min_indices, max_indices)))
+    return timestamps[selected], values[selected]
+
+
+def resample(timestamps, values, t0, t1, width):
+    """
+    Sample the line through (timestamps, values) at width evenly spaced times between t0 and t1, for plots
+    drawing evenly spaced values. Times before the first sample hold its value, as after the last sample.
+    """
+    if len(timestamps) == 0:
+        return np.zeros(0)
+    return np.interp(np.linspace(t0, t1, width), timestamps, values)
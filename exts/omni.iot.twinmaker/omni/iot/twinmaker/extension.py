@@ -6,14 +6,21 @@ import omni.ext
 import omni.ui as ui
 import omni.usd
 import carb.events
+import carb.settings
 
 from omni.services.core import main
 
 from omni.iot.twinmaker.services.api import router as api_router, set_entity_prim_map
 from omni.iot.twinmaker.store import DataBindingStore
+from omni.iot.twinmaker.metadata import EntityMetadataCache
 from omni.iot.twinmaker.scene_importer import SceneImporter
+from omni.iot.twinmaker.history_panel import PropertyHistoryPanel
+from omni.iot.twinmaker.widgets import WidgetSystem
 from omni.iot.twinmaker.utils.omni_utils import create_global_config_prim
 from omni.iot.twinmaker.utils.script_utils import attach_global_config, attach_data_binding
+from omni.iot.twinmaker.utils.twinmaker_utils import iso_to_epoch
+from omni.iot.twinmaker.utils.aws_utils import clear_aws_clients
+from omni.iot.twinmaker.constants import BENCHMARK_ENABLED_SETTING
 
 class MyExtension(omni.ext.IExt):
     def __init__(self) -> None:
@@ -28,9 +35,12 @@ class MyExtension(omni.ext.IExt):
         if e.type == int(omni.timeline.TimelineEventType.PLAY):
             carb.log_info('timeline changed PLAY')
             context.set_pickable('/', False)
+            if self._initiated:
+                WidgetSystem.get_instance().start(context.get_stage())
         elif e.type == int(omni.timeline.TimelineEventType.STOP):
             carb.log_info('timeline changed STOP')
             context.set_pickable('/', True)
+            WidgetSystem.get_instance().stop()
 
     def on_startup(self, ext_id):
         carb.log_info('[omni.iot.twinmaker] extension startup')
@@ -100,6 +110,13 @@ class MyExtension(omni.ext.IExt):
                         entity_prim_map[entity_id] = prim_path
                     set_entity_prim_map(entity_prim_map)
 
+                    # The role or region may have changed, and clients of an expired session must not be reused
+                    clear_aws_clients()
+                    # Describe every bound entity in one sweep before play starts
+                    metadata = EntityMetadataCache.force_reinit()
+                    loop = asyncio.get_event_loop()
+                    loop.run_in_executor(None, metadata.load, list(entity_prim_map.keys()))
+
                     DataBindingStore.force_reinit()
 
                     self._initiated = True
@@ -122,9 +139,47 @@ class MyExtension(omni.ext.IExt):
                     ui.Button('STOP_FETCHING', clicked_fn=on_click_stop)
                     ui.Button('IMPORT', clicked_fn=on_click_import)
 
+                # Map the timeline onto a past time range
+                history_start_string_model = ui.SimpleStringModel('2022-11-01T08:00:00Z')
+                history_end_string_model = ui.SimpleStringModel('2022-11-01T16:00:00Z')
+
+                ui.Label('History start and end time (ISO 8601)')
+                ui.StringField(model=history_start_string_model)
+                ui.StringField(model=history_end_string_model)
+
+                def on_click_start_history():
+                    if not self._initiated:
+                        carb.log_warn('initiate the extension first!')
+                        return
+                    try:
+                        start_time = iso_to_epoch(history_start_string_model.as_string)
+                        end_time = iso_to_epoch(history_end_string_model.as_string)
+                        DataBindingStore.get_instance().start_history_playback(start_time, end_time)
+                    except Exception as e:
+                        carb.log_error(f'failed to start history playback, error: {e}')
+
+                def on_click_stop_history():
+                    if self._initiated:
+                        DataBindingStore.get_instance().stop_history_playback()
+                    else:
+                        carb.log_warn('initiate the extension first!')
+
+                with ui.HStack():
+                    ui.Button('START_HISTORY', clicked_fn=on_click_start_history)
+                    ui.Button('STOP_HISTORY', clicked_fn=on_click_stop_history)
+
+        # Plot the history of the property bound to the selected prim
+        self._history_panel = PropertyHistoryPanel()
+
+        if carb.settings.get_settings().get(BENCHMARK_ENABLED_SETTING):
+            from omni.iot.twinmaker.benchmark import run_benchmarks_from_settings
+            asyncio.ensure_future(run_benchmarks_from_settings())
+
     def on_shutdown(self):
         carb.log_info('[omni.iot.twinmaker] extension shutdown')
 
-        if self._initiated:
-            DataBindingStore.get_instance().stop_data_fetching()
+        self._history_panel.destroy()
+        self._history_panel = None
+        WidgetSystem.get_instance().stop()
+        DataBindingStore.destroy_instance()
         main.deregister_router(router=api_router, prefix=self._router_prefix)
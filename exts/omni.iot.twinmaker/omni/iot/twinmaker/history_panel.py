@@ -0,0 +1,172 @@
+import asyncio
+import time
+import numpy as np
+import carb
+import omni.ui as ui
+import omni.usd
+
+from omni.iot.twinmaker.constants import ENTITY_ATTR
+from omni.iot.twinmaker.decimation import lttb, resample
+from omni.iot.twinmaker.store import DataBindingStore
+from omni.iot.twinmaker.utils.omni_utils import get_data_binding_from_prim, get_global_config
+from omni.iot.twinmaker.utils.twinmaker_utils import epoch_to_iso
+
+# Label and duration in seconds of the time ranges shown by the panel
+TIME_RANGES = [('Last 5 minutes', 300), ('Last hour', 3600), ('Last 8 hours', 8 * 3600), ('Last 24 hours', 24 * 3600)]
+PLOT_HEIGHT = 200
+# Minimum seconds between redraws on data changes
+REDRAW_INTERVAL = 1.0
+
+
+class PropertyHistoryPanel:
+    """
+    Window plotting the history of the property bound to the selected prim. Samples come from the store history,
+    or are fetched from the data source when the history does not cover the time range, and are decimated
+    to one point per pixel of the plot.
+    """
+    def __init__(self):
+        self._window = ui.Window('TwinMaker Property History', width=600, height=300)
+        self._range_index = 0
+
+        self._store = None
+        self._databinding = None
+        self._samples = None
+        # (data binding, duration, samples) of the last on demand fetch
+        self._fetched = None
+        self._status = 'Select a prim with a data binding'
+        self._last_redraw_time = 0
+
+        self._window.frame.set_build_fn(self._build)
+        self._selection_sub = omni.usd.get_context().get_stage_event_stream() \
+            .create_subscription_to_pop(self._on_stage_event, name='TWINMAKER_HISTORY_SELECTION')
+
+    def destroy(self):
+        self._selection_sub = None
+        self._set_databinding(None)
+        self._window.destroy()
+        self._window = None
+
+    def _get_duration(self):
+        return TIME_RANGES[self._range_index][1]
+
+    def _on_range_changed(self, model, item):
+        self._range_index = model.get_item_value_model().as_int
+        self.refresh()
+
+    def _on_stage_event(self, e):
+        if e.type != int(omni.usd.StageEventType.SELECTION_CHANGED):
+            return
+        paths = omni.usd.get_context().get_selection().get_selected_prim_paths()
+        databinding = None
+        if len(paths) > 0:
+            prim = omni.usd.get_context().get_stage().GetPrimAtPath(paths[-1])
+            if prim and prim.GetAttribute(ENTITY_ATTR):
+                databinding = get_data_binding_from_prim(prim)
+        self._set_databinding(databinding)
+
+    def _set_databinding(self, databinding):
+        if self._store is not None and self._databinding is not None:
+            self._store.remove_change_callback(self._databinding, self._on_data_changed)
+        self._store = None
+        self._databinding = databinding
+        self._fetched = None
+        if databinding is not None and get_global_config() is not None:
+            self._store = DataBindingStore.get_instance()
+            self._store.add_change_callback(databinding, self._on_data_changed)
+        self.refresh()
+
+    def _on_data_changed(self, databinding, datapoint):
+        now = time.monotonic()
+        if now - self._last_redraw_time >= REDRAW_INTERVAL:
+            self._last_redraw_time = now
+            self.refresh()
+
+    def refresh(self):
+        """Plot the samples of the store history in the selected time range"""
+        if self._databinding is None:
+            self._samples = None
+            self._status = 'Select a prim with a data binding'
+        elif self._store is None:
+            self._samples = None
+            self._status = 'Initiate the extension first'
+        else:
+            t1 = time.time()
+            t0 = t1 - self._get_duration()
+            samples = self._merge_fetched(self._store.get_range(self._databinding, t0, t1))
+            self._set_samples(samples, t0, t1)
+        if self._window is not None:
+            self._window.frame.rebuild()
+
+    # Complete the store history with the fetched samples older than its first sample
+    def _merge_fetched(self, samples):
+        if self._fetched is None or self._fetched[:2] != (self._databinding, self._get_duration()):
+            return samples
+        fetched_timestamps, fetched_values = self._fetched[2]
+        if samples is None or len(samples[0]) == 0:
+            return fetched_timestamps, fetched_values
+        timestamps, values = samples
+        count = int(np.searchsorted(fetched_timestamps, timestamps[0], side='left'))
+        if isinstance(values, list):
+            return np.concatenate((fetched_timestamps[:count], timestamps)), fetched_values[:count] + values
+        return np.concatenate((fetched_timestamps[:count], timestamps)), \
+            np.concatenate((fetched_values[:count], values))
+
+    def _fetch(self):
+        if self._store is None or self._databinding is None:
+            return
+        t1 = time.time()
+        t0 = t1 - self._get_duration()
+        self._status = f'Fetching {self._databinding.property_name}...'
+        self._window.frame.rebuild()
+        asyncio.ensure_future(self._async_fetch(self._store, self._databinding, t0, t1))
+
+    async def _async_fetch(self, store, databinding, t0, t1):
+        loop = asyncio.get_event_loop()
+        try:
+            samples = await loop.run_in_executor(None, store.fetch_range, databinding, t0, t1)
+        except Exception as e:
+            carb.log_error(f'failed to fetch history of {databinding}, error: {e}')
+            self._status = f'Failed to fetch history: {e}'
+            if self._window is not None:
+                self._window.frame.rebuild()
+            return
+        if databinding != self._databinding or self._window is None:
+            return
+        self._fetched = (databinding, t1 - t0, samples)
+        self.refresh()
+
+    def _get_plot_width(self):
+        return max(int(self._window.width) - 20, 10)
+
+    def _set_samples(self, samples, t0, t1):
+        self._samples = None
+        if samples is None or len(samples[0]) == 0:
+            self._status = f'No samples of {self._databinding.property_name} since {epoch_to_iso(t0)}'
+            return
+        timestamps, values = samples
+        if isinstance(values, list):
+            self._status = f'{self._databinding.property_name} = {values[-1]} (string values are not plotted)'
+            return
+        width = self._get_plot_width()
+        timestamps, values = lttb(timestamps, values, width)
+        start = max(t0, timestamps[0])
+        self._samples = resample(timestamps, values, start, timestamps[-1], width)
+        self._status = f'{self._databinding.property_name}: {len(samples[0])} samples from ' \
+                       f'{epoch_to_iso(start)} to {epoch_to_iso(timestamps[-1])}, ' \
+                       f'min {values.min():.3g}, max {values.max():.3g}'
+
+    def _build(self):
+        with ui.VStack(spacing=4):
+            with ui.HStack(height=0):
+                ui.Label(str(self._databinding) if self._databinding is not None else '')
+                combo = ui.ComboBox(self._range_index, *[label for label, _ in TIME_RANGES], width=120)
+                combo.model.add_item_changed_fn(self._on_range_changed)
+                ui.Button('REFRESH', width=80, clicked_fn=self.refresh)
+                ui.Button('FETCH', width=80, clicked_fn=self._fetch)
+            if self._samples is not None and len(self._samples) > 0:
+                low = float(self._samples.min())
+                high = float(self._samples.max())
+                if high == low:
+                    high = low + 1
+                ui.Plot(ui.Type.LINE, low, high, *self._samples.tolist(), height=PLOT_HEIGHT)
+            ui.Label(self._status, height=0, word_wrap=True)
@@ -0,0 +1,184 @@
+import asyncio
+import bisect
+import carb
+import carb.settings
+import omni.timeline
+
+from omni.iot.twinmaker.data_models import DataPoint
+from omni.iot.twinmaker.constants import PLAYBACK_CHUNK_DURATION_SETTING, PLAYBACK_LOOKAHEAD_SETTING
+from omni.iot.twinmaker.utils.twinmaker_utils import epoch_to_iso
+
+DEFAULT_CHUNK_DURATION = 600
+DEFAULT_LOOKAHEAD_CHUNKS = 2
+
+
+class HistoryPlayback:
+    """
+    Serve historical property values for the Kit timeline playhead. The timeline range is mapped onto the wall clock
+    range [start_time, end_time] (seconds since epoch). Property history is fetched in chunks of chunk_duration seconds,
+    from the chunk before the playhead to lookahead chunks after it, and older chunks are evicted. Properties without
+    a sample in these chunks, like rarely changing states, get the latest sample before them.
+    """
+    def __init__(self, worker, start_time, end_time):
+        if end_time <= start_time:
+            raise Exception('History end time must be after start time')
+        settings = carb.settings.get_settings()
+        self._worker = worker
+        self._start_time = start_time
+        self._end_time = end_time
+        self._chunk_duration = settings.get(PLAYBACK_CHUNK_DURATION_SETTING) or DEFAULT_CHUNK_DURATION
+        self._lookahead = settings.get(PLAYBACK_LOOKAHEAD_SETTING) or DEFAULT_LOOKAHEAD_CHUNKS
+        self._timeline = omni.timeline.get_timeline_interface()
+
+        # (databinding, chunk index) -> (timestamps, values) in ascending time
+        self._chunks = dict()
+        self._requested_chunks = set()
+        # (databinding, chunk index) -> latest data point before the chunk, None if there is none
+        self._previous = dict()
+        self._requested_previous = set()
+        self._last_playhead_time = None
+        self._has_new_chunks = False
+
+    def get_playhead_time(self):
+        timeline_start = self._timeline.get_start_time()
+        timeline_duration = self._timeline.get_end_time() - timeline_start
+        if timeline_duration <= 0:
+            return self._start_time
+        progress = (self._timeline.get_current_time() - timeline_start) / timeline_duration
+        progress = min(max(progress, 0), 1)
+        return self._start_time + progress * (self._end_time - self._start_time)
+
+    def _chunk_index(self, t):
+        return int((t - self._start_time) // self._chunk_duration)
+
+    def _chunk_range(self, index):
+        chunk_start = self._start_time + index * self._chunk_duration
+        return chunk_start, min(chunk_start + self._chunk_duration, self._end_time)
+
+    def update(self, loop):
+        worker = self._worker
+        worker._resolve_property_value_types(loop)
+        databindings = [d for d in worker._subscribed_databindings if d in worker._databinding_valuetype]
+
+        playhead_time = self.get_playhead_time()
+        playhead_index = self._chunk_index(playhead_time)
+        last_index = self._chunk_index(self._end_time - 1e-6)
+        for index in range(max(playhead_index - 1, 0), min(playhead_index + self._lookahead, last_index) + 1):
+            self._request_chunk(loop, databindings, index)
+        self._evict_chunks(playhead_index)
+
+        if playhead_time == self._last_playhead_time and not self._has_new_chunks:
+            return
+        self._last_playhead_time = playhead_time
+        self._has_new_chunks = False
+        # Values at the playhead are published together as one snapshot
+        current_datapoints = worker._snapshot.datapoints
+        changes = dict()
+        missing_previous = []
+        for d in databindings:
+            datapoint = self._get_datapoint_at(d, playhead_time, playhead_index, missing_previous)
+            if datapoint is None:
+                continue
+            current = current_datapoints.get(d)
+            if current is None or current.value != datapoint.value:
+                changes[d] = datapoint
+        worker._publish(changes)
+        self._request_previous(loop, missing_previous, max(playhead_index - 1, 0))
+
+    def _request_chunk(self, loop, databindings, index):
+        missing = [d for d in databindings if (d, index) not in self._requested_chunks]
+        if len(missing) == 0:
+            return
+        for d in missing:
+            self._requested_chunks.add((d, index))
+        for group in self._worker._group_databindings(missing):
+            data_types = {d: self._worker._databinding_valuetype[d] for d in group}
+            future = self._worker._run_in_executor(loop, self._fetch_chunk, group, data_types, index)
+            asyncio.ensure_future(self._on_chunk_fetched(future, group, index))
+
+    def _fetch_chunk(self, databindings, data_types, index):
+        chunk_start, chunk_end = self._chunk_range(index)
+        return self._worker._requests.call(databindings[0].entity_id, self._worker._data_source.get_property_values,
+                                           databindings, data_types, epoch_to_iso(chunk_start), epoch_to_iso(chunk_end))
+
+    async def _on_chunk_fetched(self, future, databindings, index):
+        try:
+            history = await future
+        except Exception as e:
+            carb.log_error(f'failed to fetch history chunk {index} of {databindings[0].entity_id}, error: {e}')
+            # Request the chunk again on the next update
+            for d in databindings:
+                self._requested_chunks.discard((d, index))
+            return
+        for d, datapoints in history.items():
+            if (d, index) not in self._requested_chunks:
+                # Evicted while fetching
+                continue
+            self._chunks[(d, index)] = ([p.timestamp for p in reversed(datapoints)],
+                                        [p.value for p in reversed(datapoints)])
+        self._has_new_chunks = True
+
+    # Fetch the latest sample before a chunk of data bindings without sample in the chunks around the playhead
+    def _request_previous(self, loop, databindings, index):
+        if len(databindings) == 0:
+            return
+        # One task per data binding, TwinMaker queries the latest sample of each property separately
+        for d in databindings:
+            self._requested_previous.add((d, index))
+            data_types = {d: self._worker._databinding_valuetype[d]}
+            future = self._worker._run_in_executor(loop, self._fetch_previous, [d], data_types, index)
+            asyncio.ensure_future(self._on_previous_fetched(future, [d], index))
+
+    # Latest sample in the max lookback before the chunk start, with one descending query of a single result
+    def _fetch_previous(self, databindings, data_types, index):
+        chunk_start, _ = self._chunk_range(index)
+        return self._worker._requests.call(databindings[0].entity_id,
+                                           self._worker._data_source.get_latest_property_values,
+                                           databindings, data_types,
+                                           epoch_to_iso(chunk_start - self._worker._max_lookback()),
+                                           epoch_to_iso(chunk_start))
+
+    async def _on_previous_fetched(self, future, databindings, index):
+        try:
+            latest = await future
+        except Exception as e:
+            carb.log_error(f'failed to fetch values before history chunk {index} of {databindings[0].entity_id}, '
+                           f'error: {e}')
+            for d in databindings:
+                self._requested_previous.discard((d, index))
+            return
+        for d, datapoint in latest.items():
+            if (d, index) in self._requested_previous:
+                self._previous[(d, index)] = datapoint
+        self._has_new_chunks = True
+
+    def _evict_chunks(self, playhead_index):
+        keep = range(playhead_index - 1, playhead_index + self._lookahead + 1)
+        for key in [k for k in self._requested_chunks if k[1] not in keep]:
+            self._requested_chunks.discard(key)
+            self._chunks.pop(key, None)
+        for key in [k for k in self._requested_previous if k[1] not in keep]:
+            self._requested_previous.discard(key)
+            self._previous.pop(key, None)
+
+    # Latest sample at or before t, looking in the playhead chunk then in the previous one, then before them.
+    # Data bindings whose chunks are fetched without a sample before t are added to missing_previous
+    # until the latest sample before the chunks is fetched.
+    def _get_datapoint_at(self, databinding, t, index, missing_previous):
+        first_index = max(index - 1, 0)
+        fetched = True
+        for i in range(index, first_index - 1, -1):
+            chunk = self._chunks.get((databinding, i))
+            if chunk is None:
+                fetched = False
+                continue
+            timestamps, values = chunk
+            position = bisect.bisect_right(timestamps, t)
+            if position > 0:
+                return DataPoint(timestamps[position - 1], values[position - 1])
+        if not fetched:
+            return None
+        key = (databinding, first_index)
+        if key not in self._requested_previous:
+            missing_previous.append(databinding)
+        return self._previous.get(key)
@@ -0,0 +1,42 @@
+import carb
+import numpy as np
+
+# Interpolation modes of the widgets between data samples
+HOLD = 0
+LINEAR = 1
+DAMPED = 2
+INTERPOLATION_MODES = {'hold': HOLD, 'linear': LINEAR, 'damped': DAMPED}
+
+# Smooth time of the damped mode relative to the sample interval, settling within 1% by the next sample
+DAMPED_SMOOTH_TIME_RATIO = 0.25
+
+
+def parse_interpolation(name, default=HOLD):
+    """Return the interpolation mode of a name, or default when the name is not set or unknown"""
+    if not name:
+        return default
+    mode = INTERPOLATION_MODES.get(str(name).lower())
+    if mode is None:
+        carb.log_warn(f'unsupported interpolation {name}, expected one of {list(INTERPOLATION_MODES.keys())}')
+        return default
+    return mode
+
+
+def lerp(start, target, start_time, duration, now):
+    """Linear interpolation from start at start_time to target after duration seconds, and whether it ended"""
+    progress = np.clip((now - start_time) / duration, 0, 1)
+    return start + (target - start) * progress, progress >= 1
+
+
+def smooth_damp(current, target, velocity, smooth_time, dt):
+    """
+    One step of dt seconds of a critically damped spring moving current toward target, on arrays.
+    Return the new values and velocities. smooth_time is about the time to reach the target, without overshoot.
+    See Game Programming Gems 4, chapter 1.10.
+    """
+    omega = 2 / smooth_time
+    x = omega * dt
+    decay = 1 / (1 + x + 0.48 * x * x + 0.235 * x * x * x)
+    change = current - target
+    temp = (velocity + omega * change) * dt
+    return target + (change + temp) * decay, (velocity - omega * temp) * decay
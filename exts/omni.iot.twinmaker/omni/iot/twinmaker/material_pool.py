@@ -0,0 +1,58 @@
+import carb
+from pxr import Sdf
+
+from omni.iot.twinmaker.utils.profiler_utils import profiled
+
+MATERIAL_POOL_PATH = Sdf.Path('/TwinMakerRuntime/Materials')
+# Albedo added to the tint of a matched rule color, as ModelShader did
+RULE_ALBEDO_ADD = 0.5
+
+
+class MaterialPool:
+    """
+    Material variants of the bound materials, one per (base material, rule color), defined in the runtime layer
+    when prims are bound, so a matched rule only switches the material binding of its prim. A variant references
+    its base material and overrides the tint of its Shader, the shared base material is never modified.
+    """
+    def __init__(self, runtime_layer):
+        self._layer = runtime_layer.layer
+        # (base material path, color) -> variant path
+        self._variants = dict()
+        # Variants to define on the next flush, [(variant path, base material path, color)]
+        self._pending = []
+
+    def __len__(self):
+        return len(self._variants)
+
+    def get_variant(self, base_path: Sdf.Path, color) -> Sdf.Path:
+        """Return the path of the variant of a material with a color, defined on the next flush when new"""
+        key = (base_path, tuple(color))
+        variant_path = self._variants.get(key)
+        if variant_path is None:
+            variant_path = MATERIAL_POOL_PATH.AppendChild(f'{base_path.name}_{len(self._variants)}')
+            self._variants[key] = variant_path
+            self._pending.append((variant_path, base_path, color))
+        return variant_path
+
+    @profiled('TwinMaker::MaterialPool.flush')
+    def flush(self):
+        if len(self._pending) == 0:
+            return
+        pending, self._pending = self._pending, []
+        with Sdf.ChangeBlock():
+            self._define(MATERIAL_POOL_PATH.GetParentPath(), 'Scope')
+            self._define(MATERIAL_POOL_PATH, 'Scope')
+            for variant_path, base_path, color in pending:
+                material = self._define(variant_path, 'Material')
+                material.referenceList.Prepend(Sdf.Reference(primPath=base_path))
+                shader = Sdf.CreatePrimInLayer(self._layer, variant_path.AppendChild('Shader'))
+                Sdf.AttributeSpec(shader, 'inputs:diffuse_tint', Sdf.ValueTypeNames.Color3f).default = color
+                Sdf.AttributeSpec(shader, 'inputs:albedo_add', Sdf.ValueTypeNames.Float).default = RULE_ALBEDO_ADD
+        carb.log_info(f'material pool has {len(self._variants)} variants')
+
+    # Defined prims, an over would hide the variants from traversals and rendering
+    def _define(self, path, type_name):
+        spec = Sdf.CreatePrimInLayer(self._layer, path)
+        spec.specifier = Sdf.SpecifierDef
+        spec.typeName = type_name
+        return spec
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+import time
+import carb
+
+from omni.iot.twinmaker.data_source import create_data_source
+from omni.iot.twinmaker.request_scheduler import get_request_scheduler, RequestRejectedError
+from omni.iot.twinmaker.constants import FETCH_EXECUTOR_WORKERS
+from omni.iot.twinmaker.utils.omni_utils import get_global_config
+from omni.iot.twinmaker.utils.twinmaker_utils import convert_data_type
+
+DEFAULT_METADATA_TTL = 300
+# Delay before retrying an entity whose load failed, doubled on each failure up to the TTL
+DEFAULT_RETRY_DELAY = 5
+
+
+class EntityMetadataCache:
+    """
+    Component and property definitions of TwinMaker entities, cached by entityId for a given TTL.
+    Shared between the data fetching worker and the scene importer so that each entity is described once per TTL.
+    """
+
+    __instance: EntityMetadataCache = None
+
+    @classmethod
+    def get_instance(cls) -> EntityMetadataCache:
+        if cls.__instance is None:
+            global_config = get_global_config()
+            data_source = create_data_source(global_config['region'], global_config['role'], global_config['workspace_id'])
+            cls.__instance = EntityMetadataCache(data_source,
+                                                 request_scheduler=get_request_scheduler(global_config['workspace_id'],
+                                                                                         data_source))
+        return cls.__instance
+
+    @classmethod
+    def force_reinit(cls) -> EntityMetadataCache:
+        cls.__instance = None
+        return cls.get_instance()
+
+    def __init__(self, data_source, ttl=DEFAULT_METADATA_TTL, request_scheduler=None):
+        self._data_source = data_source
+        self._requests = request_scheduler
+        self._ttl = ttl
+        self._lock = Lock()
+        # entityId -> (load time, {componentName: {propertyName: TwinMaker data type}})
+        self._entities = dict()
+        self._pending_entities = set()
+        # entityId -> (retry time, retry delay) of entities whose last load failed
+        self._failed_entities = dict()
+
+    @property
+    def data_source(self):
+        """Data source the metadata is loaded from, shared with the data fetching worker"""
+        return self._data_source
+
+    def _is_fresh(self, entity_id):
+        entry = self._entities.get(entity_id)
+        return entry is not None and entry[0] + self._ttl > time.monotonic()
+
+    def _is_backing_off(self, entity_id, now):
+        entry = self._failed_entities.get(entity_id)
+        return entry is not None and entry[0] > now
+
+    def get_missing_entities(self, entity_ids):
+        """
+        Return the entities that are neither cached, being loaded nor waiting to be retried after a failed load,
+        and mark them as being loaded
+        """
+        now = time.monotonic()
+        with self._lock:
+            missing = {e for e in entity_ids if not self._is_fresh(e) and e not in self._pending_entities
+                       and not self._is_backing_off(e, now)}
+            self._pending_entities.update(missing)
+        return missing
+
+    def load_entity(self, entity_id):
+        try:
+            if self._requests is not None:
+                components = self._requests.call(entity_id, self._data_source.get_entity_property_types, entity_id)
+            else:
+                components = self._data_source.get_entity_property_types(entity_id)
+            with self._lock:
+                self._entities[entity_id] = (time.monotonic(), components)
+                self._failed_entities.pop(entity_id, None)
+            carb.log_info(f'loaded metadata for entity {entity_id}')
+        except RequestRejectedError as e:
+            delay = self._on_load_failed(entity_id)
+            carb.log_info(f'deferred metadata of entity {entity_id} for {delay}s: {e}')
+        except Exception as e:
+            delay = self._on_load_failed(entity_id)
+            carb.log_error(f'failed to load metadata for entity {entity_id}, retrying in {delay}s, error: {e}')
+        finally:
+            with self._lock:
+                self._pending_entities.discard(entity_id)
+
+    # Back off the next load of an entity after a failed load, return the retry delay
+    def _on_load_failed(self, entity_id):
+        with self._lock:
+            entry = self._failed_entities.get(entity_id)
+            delay = DEFAULT_RETRY_DELAY if entry is None else min(entry[1] * 2, self._ttl)
+            self._failed_entities[entity_id] = (time.monotonic() + delay, delay)
+        return delay
+
+    # Load all given entities in one concurrent sweep, skipping the ones already cached
+    def load(self, entity_ids, max_workers=FETCH_EXECUTOR_WORKERS):
+        missing = self.get_missing_entities(set(entity_ids))
+        if len(missing) == 0:
+            return
+        carb.log_info(f'loading metadata for {len(missing)} entities')
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(self.load_entity, missing))
+
+    def get_property_definitions(self, entity_id):
+        entry = self._entities.get(entity_id)
+        return entry[1] if entry is not None else None
+
+    def get_property_value_type(self, data_binding):
+        """Return the value type of a data binding, or None if its entity is not loaded yet"""
+        components = self.get_property_definitions(data_binding.entity_id)
+        if components is None:
+            return None
+        try:
+            property_type = components[data_binding.component_name][data_binding.property_name]
+        except KeyError:
+            raise Exception(f'Property not found in entity metadata: {data_binding}')
+        return convert_data_type(property_type)
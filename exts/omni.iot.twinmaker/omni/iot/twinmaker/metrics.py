@@ -0,0 +1,154 @@
+from threading import Lock
+import bisect
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+FRAME_BUCKETS = (0.0001, 0.0005, 0.001, 0.002, 0.004, 0.008, 0.016, 0.033, 0.066, 0.1)
+
+
+class Histogram:
+    """Distribution of observed values in cumulative buckets, as Prometheus histograms"""
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self._counts[bisect.bisect_left(self._buckets, value)] += 1
+            self._sum += value
+            self._count += 1
+
+    def get(self):
+        """Return ([(upper bound, cumulative count)], sum, count), the last bound being +Inf"""
+        with self._lock:
+            cumulative = []
+            total = 0
+            for bound, count in zip(self._buckets + (float('inf'),), self._counts):
+                total += count
+                cumulative.append((bound, total))
+            return cumulative, self._sum, self._count
+
+
+class MetricsRegistry:
+    """
+    Performance metrics of the extension. Histograms and counters are updated where the work happens,
+    gauges are read from the registered collectors when metrics are rendered.
+    """
+    def __init__(self):
+        self._lock = Lock()
+        # name -> (help, {labels: Histogram})
+        self._histograms = dict()
+        # name -> (help, {labels: count})
+        self._counters = dict()
+        # name -> collector() returning [(gauge name, help, [(labels, value)])]
+        self._collectors = dict()
+
+    def observe(self, name, help, value, labels=(), buckets=LATENCY_BUCKETS):
+        """Add a value to the histogram of name, labels are a tuple of (label, value) pairs"""
+        with self._lock:
+            series = self._histograms.setdefault(name, (help, dict()))[1]
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = Histogram(buckets)
+                series[labels] = histogram
+        histogram.observe(value)
+
+    def increment(self, name, help, labels=(), amount=1):
+        with self._lock:
+            series = self._counters.setdefault(name, (help, dict()))[1]
+            series[labels] = series.get(labels, 0) + amount
+
+    def get_totals(self, name):
+        """Return the (sum, count) of the histogram of name over all its labels"""
+        with self._lock:
+            series = list(self._histograms.get(name, (None, dict()))[1].values())
+        total = 0.0
+        count = 0
+        for histogram in series:
+            _, histogram_sum, histogram_count = histogram.get()
+            total += histogram_sum
+            count += histogram_count
+        return total, count
+
+    def set_collector(self, key, collector):
+        with self._lock:
+            self._collectors[key] = collector
+
+    def remove_collector(self, key, collector=None):
+        with self._lock:
+            if collector is None or self._collectors.get(key) == collector:
+                self._collectors.pop(key, None)
+
+    def _collect_gauges(self):
+        with self._lock:
+            collectors = list(self._collectors.values())
+        gauges = []
+        for collector in collectors:
+            gauges += collector()
+        return gauges
+
+    def to_dict(self):
+        with self._lock:
+            histograms = {name: (help, dict(series)) for name, (help, series) in self._histograms.items()}
+            counters = {name: (help, dict(series)) for name, (help, series) in self._counters.items()}
+        result = {'histograms': {}, 'counters': {}, 'gauges': {}}
+        for name, (_, series) in histograms.items():
+            result['histograms'][name] = []
+            for labels, histogram in series.items():
+                buckets, total, count = histogram.get()
+                result['histograms'][name].append({
+                    'labels': dict(labels),
+                    'buckets': {_format_bound(bound): n for bound, n in buckets},
+                    'sum': total,
+                    'count': count
+                })
+        for name, (_, series) in counters.items():
+            result['counters'][name] = [{'labels': dict(labels), 'value': value} for labels, value in series.items()]
+        for name, _, samples in self._collect_gauges():
+            result['gauges'][name] = [{'labels': dict(labels), 'value': value} for labels, value in samples]
+        return result
+
+    def to_prometheus(self):
+        """Render the metrics in the Prometheus text exposition format"""
+        with self._lock:
+            histograms = {name: (help, dict(series)) for name, (help, series) in self._histograms.items()}
+            counters = {name: (help, dict(series)) for name, (help, series) in self._counters.items()}
+        lines = []
+        for name, (help, series) in histograms.items():
+            lines += [f'# HELP {name} {help}', f'# TYPE {name} histogram']
+            for labels, histogram in series.items():
+                buckets, total, count = histogram.get()
+                for bound, n in buckets:
+                    lines.append(f'{name}_bucket{_format_labels(labels + (("le", _format_bound(bound)),))} {n}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {total}')
+                lines.append(f'{name}_count{_format_labels(labels)} {count}')
+        for name, (help, series) in counters.items():
+            lines += [f'# HELP {name} {help}', f'# TYPE {name} counter']
+            for labels, value in series.items():
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+        for name, help, samples in self._collect_gauges():
+            lines += [f'# HELP {name} {help}', f'# TYPE {name} gauge']
+            for labels, value in samples:
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+def _format_labels(labels):
+    if len(labels) == 0:
+        return ''
+    escaped = [(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for k, v in labels]
+    return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}'
+
+
+_metrics = MetricsRegistry()
+
+
+def get_metrics():
+    return _metrics
@@ -0,0 +1,106 @@
+from threading import Lock
+import json
+import os
+import sqlite3
+import carb
+import carb.settings
+import carb.tokens
+
+from omni.iot.twinmaker.data_models import DataBinding, DataPoint
+from omni.iot.twinmaker.constants import PERSISTENT_CACHE_ENABLED_SETTING, PERSISTENT_CACHE_PATH_SETTING
+
+DEFAULT_CACHE_PATH = '${data}/omni.iot.twinmaker/cache.db'
+
+_SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS value_types (
+        workspace_id TEXT, entity_id TEXT, component_name TEXT, property_name TEXT, value_type TEXT,
+        PRIMARY KEY (workspace_id, entity_id, component_name, property_name))''',
+    '''CREATE TABLE IF NOT EXISTS datapoints (
+        workspace_id TEXT, entity_id TEXT, component_name TEXT, property_name TEXT, timestamp REAL, value TEXT,
+        PRIMARY KEY (workspace_id, entity_id, component_name, property_name))'''
+]
+
+
+class PersistentCache:
+    """
+    SQLite cache of resolved property value types and the last data point of each data binding, scoped to a workspace.
+    Writes are buffered in memory and written back in one transaction on flush.
+    """
+    def __init__(self, path, workspace_id):
+        self._workspace_id = workspace_id
+        self._lock = Lock()
+        self._pending_value_types = dict()
+        self._pending_datapoints = dict()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+        carb.log_info(f'opened persistent cache {path}')
+
+    def load_value_types(self):
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT entity_id, component_name, property_name, value_type FROM value_types WHERE workspace_id = ?',
+                (self._workspace_id,)).fetchall()
+        return {DataBinding(e, c, p): value_type for e, c, p, value_type in rows}
+
+    def load_datapoints(self):
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT entity_id, component_name, property_name, timestamp, value FROM datapoints WHERE workspace_id = ?',
+                (self._workspace_id,)).fetchall()
+        return {DataBinding(e, c, p): DataPoint(float(timestamp), json.loads(value)) for e, c, p, timestamp, value in rows}
+
+    def put_value_type(self, databinding, value_type):
+        with self._lock:
+            self._pending_value_types[databinding] = value_type
+
+    def put_datapoint(self, databinding, datapoint):
+        if datapoint is None or datapoint.value is None:
+            return
+        with self._lock:
+            self._pending_datapoints[databinding] = datapoint
+
+    def _binding_key(self, databinding):
+        return (self._workspace_id, databinding.entity_id, databinding.component_name, databinding.property_name)
+
+    def flush(self):
+        with self._lock:
+            value_types, self._pending_value_types = self._pending_value_types, dict()
+            datapoints, self._pending_datapoints = self._pending_datapoints, dict()
+            if len(value_types) == 0 and len(datapoints) == 0:
+                return
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        'INSERT OR REPLACE INTO value_types VALUES (?, ?, ?, ?, ?)',
+                        [self._binding_key(d) + (t,) for d, t in value_types.items()])
+                    self._conn.executemany(
+                        'INSERT OR REPLACE INTO datapoints VALUES (?, ?, ?, ?, ?, ?)',
+                        [self._binding_key(d) + (p.timestamp, json.dumps(p.value)) for d, p in datapoints.items()])
+            except sqlite3.Error as e:
+                carb.log_error(f'failed to write persistent cache, error: {e}')
+                return
+        carb.log_info(f'persisted {len(value_types)} value types and {len(datapoints)} data points')
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+
+def open_persistent_cache(workspace_id):
+    """Open the persistent cache for a workspace, or return None if it is disabled in the extension settings"""
+    settings = carb.settings.get_settings()
+    if not settings.get(PERSISTENT_CACHE_ENABLED_SETTING):
+        return None
+
+    path = settings.get(PERSISTENT_CACHE_PATH_SETTING) or DEFAULT_CACHE_PATH
+    path = carb.tokens.get_tokens_interface().resolve(path)
+    try:
+        return PersistentCache(path, workspace_id)
+    except (sqlite3.Error, OSError) as e:
+        carb.log_error(f'failed to open persistent cache {path}, error: {e}')
+        return None
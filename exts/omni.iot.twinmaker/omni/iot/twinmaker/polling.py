@@ -0,0 +1,97 @@
+import carb.settings
+
+from omni.iot.twinmaker.constants import POLLING_DEFAULT_INTERVAL_SETTING, POLLING_MIN_INTERVAL_SETTING, \
+    POLLING_MAX_INTERVAL_SETTING, POLLING_ADAPTIVE_SETTING
+
+DEFAULT_POLL_INTERVAL = 2
+DEFAULT_MIN_POLL_INTERVAL = 1
+DEFAULT_MAX_POLL_INTERVAL = 60
+# Growth of the interval of a data binding after each fetch without a new value
+BACKOFF_FACTOR = 1.5
+# Shrink of the interval of a data binding after each fetch with a new value
+SPEEDUP_FACTOR = 2
+
+
+class PollSchedule:
+    """
+    Polling interval of one data binding. The base interval is either declared in the data binding
+    or the default one. In adaptive mode the interval grows while the value does not change, up to the max interval,
+    and falls back to the base interval then shrinks down to the min interval while the value keeps changing.
+    """
+    def __init__(self, base_interval, min_interval, max_interval, adaptive):
+        self.base_interval = base_interval
+        self.interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.adaptive = adaptive
+        # Fetch as soon as possible
+        self.next_due = 0
+
+    def on_fetched(self, now, changed):
+        if self.adaptive:
+            if changed:
+                self.interval = max(self.min_interval, min(self.base_interval, self.interval / SPEEDUP_FACTOR))
+            else:
+                self.interval = min(self.max_interval, self.interval * BACKOFF_FACTOR)
+        self.next_due = now + self.interval
+
+
+class PollScheduler:
+    """Poll schedules of subscribed data bindings. Times are given by time.monotonic()"""
+    def __init__(self, default_interval=None):
+        settings = carb.settings.get_settings()
+        self._default_interval = default_interval or settings.get(POLLING_DEFAULT_INTERVAL_SETTING) \
+            or DEFAULT_POLL_INTERVAL
+        self._min_interval = settings.get(POLLING_MIN_INTERVAL_SETTING) or DEFAULT_MIN_POLL_INTERVAL
+        self._max_interval = settings.get(POLLING_MAX_INTERVAL_SETTING) or DEFAULT_MAX_POLL_INTERVAL
+        adaptive = settings.get(POLLING_ADAPTIVE_SETTING)
+        self._adaptive = True if adaptive is None else adaptive
+        self._schedules = dict()
+
+    @property
+    def min_interval(self):
+        return self._min_interval
+
+    def add(self, databinding, interval=None):
+        """Schedule a data binding, a data binding bound several times is polled at the shortest declared interval"""
+        base_interval = interval or self._default_interval
+        schedule = self._schedules.get(databinding)
+        if schedule is None:
+            self._schedules[databinding] = PollSchedule(base_interval, min(self._min_interval, base_interval),
+                                                        max(self._max_interval, base_interval), self._adaptive)
+        elif base_interval < schedule.base_interval:
+            schedule.base_interval = base_interval
+            schedule.interval = min(schedule.interval, base_interval)
+            schedule.min_interval = min(schedule.min_interval, base_interval)
+            schedule.next_due = 0
+
+    def set_intervals(self, databinding, intervals):
+        """
+        Poll a scheduled data binding at the shortest of the declared intervals, None for the default one.
+        The schedule is updated in place: its due time is kept and its adapted interval is bounded by the new limits.
+        """
+        schedule = self._schedules.get(databinding)
+        if schedule is None:
+            return
+        base_interval = min(interval or self._default_interval for interval in intervals)
+        schedule.base_interval = base_interval
+        schedule.min_interval = min(self._min_interval, base_interval)
+        schedule.max_interval = max(self._max_interval, base_interval)
+        if schedule.adaptive:
+            schedule.interval = max(schedule.min_interval, min(schedule.max_interval, schedule.interval))
+        else:
+            schedule.interval = base_interval
+
+    def remove(self, databinding):
+        self._schedules.pop(databinding, None)
+
+    def get_due(self, databindings, now):
+        return [d for d in databindings if d in self._schedules and self._schedules[d].next_due <= now]
+
+    def on_fetched(self, databinding, now, changed):
+        schedule = self._schedules.get(databinding)
+        if schedule is not None:
+            schedule.on_fetched(now, changed)
+
+    def get_next_due(self):
+        return min((s.next_due for s in self._schedules.values()), default=float('inf'))
@@ -0,0 +1,273 @@
+from threading import Lock
+import bisect
+import json
+import mmap
+import os
+import struct
+import time
+import carb
+import carb.settings
+
+from omni.iot.twinmaker.data_models import DataBinding, DataPoint
+from omni.iot.twinmaker.data_source import DataSource
+from omni.iot.twinmaker.constants import REPLAY_PATH_SETTING, REPLAY_SPEED_SETTING, REPLAY_LOOP_SETTING
+from omni.iot.twinmaker.utils.twinmaker_utils import iso_to_epoch
+
+# Recording file layout, little endian:
+#   header: MAGIC
+#   records, starting with their kind:
+#     b'B' binding definition: uint32 binding id, uint16 length, JSON [entityId, componentName, propertyName]
+#     b'S' string definition: uint32 string id, uint16 length, UTF-8 string
+#     b'D' numeric data point: uint32 binding id, float64 timestamp, float64 value
+#     b'T' string data point: uint32 binding id, float64 timestamp, uint32 string id
+MAGIC = b'TMREC\x00\x00\x01'
+_DEFINITION = struct.Struct('<cIH')
+_DOUBLE_POINT = struct.Struct('<cIdd')
+_STRING_POINT = struct.Struct('<cIdI')
+
+# Bytes buffered before writing to the file
+WRITE_BUFFER_SIZE = 64 * 1024
+
+
+def _parse_recording(path):
+    """
+    Parse a recording, return its samples, its strings by id and the offset after its last complete record.
+    A record cut by a crash while recording ends the parsing, the offset is 0 when the header is incomplete.
+    """
+    bindings = dict()
+    strings = dict()
+    samples = dict()
+    with open(path, 'rb') as file:
+        if os.fstat(file.fileno()).st_size < len(MAGIC):
+            return samples, strings, 0
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            if data[:len(MAGIC)] != MAGIC:
+                raise Exception(f'Not a TwinMaker recording: {path}')
+            offset = len(MAGIC)
+            size = len(data)
+            while offset < size:
+                kind = data[offset:offset + 1]
+                if kind == b'D':
+                    if offset + _DOUBLE_POINT.size > size:
+                        break
+                    _, binding_id, timestamp, value = _DOUBLE_POINT.unpack_from(data, offset)
+                    offset += _DOUBLE_POINT.size
+                elif kind == b'T':
+                    if offset + _STRING_POINT.size > size:
+                        break
+                    _, binding_id, timestamp, string_id = _STRING_POINT.unpack_from(data, offset)
+                    value = strings[string_id]
+                    offset += _STRING_POINT.size
+                elif kind == b'B' or kind == b'S':
+                    if offset + _DEFINITION.size > size:
+                        break
+                    _, definition_id, length = _DEFINITION.unpack_from(data, offset)
+                    end = offset + _DEFINITION.size + length
+                    if end > size:
+                        break
+                    text = data[offset + _DEFINITION.size:end].decode('utf-8')
+                    offset = end
+                    if kind == b'B':
+                        databinding = DataBinding(*json.loads(text))
+                        bindings[definition_id] = databinding
+                        samples.setdefault(databinding, ([], []))
+                    else:
+                        strings[definition_id] = text
+                    continue
+                else:
+                    raise Exception(f'Corrupted recording {path} at offset {offset}')
+                timestamps, values = samples[bindings[binding_id]]
+                timestamps.append(timestamp)
+                values.append(value)
+            if offset < size:
+                carb.log_warn(f'recording {path} ends with an incomplete record at offset {offset}')
+    return samples, strings, offset
+
+
+def read_recording(path):
+    """
+    Read a recording, return {DataBinding: (timestamps, values)} with the samples of each data binding
+    in recording order
+    """
+    return _parse_recording(path)[0]
+
+
+class Recorder:
+    """Append fetched data points to a recording file, appending to the recording if it already exists"""
+    def __init__(self, path):
+        self._path = path
+        self._lock = Lock()
+        self._binding_ids = dict()
+        self._string_ids = dict()
+        self._buffer = bytearray()
+
+        end = 0
+        if os.path.isfile(path):
+            samples, strings, end = _parse_recording(path)
+        if end > 0:
+            for databinding in samples.keys():
+                self._binding_ids[databinding] = len(self._binding_ids)
+            # Strings are defined again on first use
+            self._next_string_id = len(strings)
+            self._file = open(path, 'r+b')
+            # Drop the record cut by a crash, records appended after it could not be read
+            self._file.truncate(end)
+            self._file.seek(end)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = open(path, 'wb')
+            self._file.write(MAGIC)
+            self._next_string_id = 0
+        carb.log_info(f'recording data points to {path}')
+
+    def _define(self, kind, definition_id, text):
+        encoded = text.encode('utf-8')
+        self._buffer += _DEFINITION.pack(kind, definition_id, len(encoded))
+        self._buffer += encoded
+
+    def _get_binding_id(self, databinding):
+        binding_id = self._binding_ids.get(databinding)
+        if binding_id is None:
+            binding_id = len(self._binding_ids)
+            self._binding_ids[databinding] = binding_id
+            self._define(b'B', binding_id, json.dumps(
+                [databinding.entity_id, databinding.component_name, databinding.property_name]))
+        return binding_id
+
+    def _get_string_id(self, value):
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = self._next_string_id
+            self._next_string_id += 1
+            self._string_ids[value] = string_id
+            self._define(b'S', string_id, value)
+        return string_id
+
+    def record(self, databinding, datapoints):
+        """Append data points of a data binding, in any order"""
+        with self._lock:
+            if self._file is None:
+                return
+            binding_id = self._get_binding_id(databinding)
+            for p in reversed(datapoints):
+                if p.value is None:
+                    continue
+                if isinstance(p.value, str):
+                    self._buffer += _STRING_POINT.pack(b'T', binding_id, p.timestamp, self._get_string_id(p.value))
+                else:
+                    self._buffer += _DOUBLE_POINT.pack(b'D', binding_id, p.timestamp, float(p.value))
+            if len(self._buffer) >= WRITE_BUFFER_SIZE:
+                self._write()
+
+    def _write(self):
+        self._file.write(self._buffer)
+        self._buffer = bytearray()
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._write()
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._write()
+                self._file.close()
+                self._file = None
+        carb.log_info(f'closed recording {self._path}')
+
+
+class ReplayDataSource(DataSource):
+    """
+    Data source playing back a recording. Recording time is mapped to wall clock time starting when the replay source
+    is created, scaled by speed, and data points are returned with their wall clock time.
+    With loop enabled the recording starts over after its last sample.
+    """
+    def __init__(self, path, speed=1.0, loop=False):
+        self._speed = speed
+        self._loop = loop
+        self._samples = dict()
+        self._property_types = dict()
+        recording = dict()
+        if not path or not os.path.isfile(path):
+            carb.log_error(f'replay path {path!r} is not a file, set replay.path to a recording')
+        else:
+            try:
+                recording = read_recording(path)
+            except Exception as e:
+                carb.log_error(f'failed to read recording {path}, error: {e}')
+        for databinding, (timestamps, values) in recording.items():
+            if len(timestamps) == 0:
+                continue
+            order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+            self._samples[databinding] = ([timestamps[i] for i in order], [values[i] for i in order])
+            self._property_types.setdefault(databinding.entity_id, {}).setdefault(databinding.component_name, {}) \
+                [databinding.property_name] = 'STRING' if isinstance(values[0], str) else 'DOUBLE'
+
+        all_timestamps = [t for timestamps, _ in self._samples.values() for t in (timestamps[0], timestamps[-1])]
+        self._recording_start = min(all_timestamps, default=0)
+        self._recording_duration = max(all_timestamps, default=0) - self._recording_start
+        self._replay_start = time.time()
+        carb.log_info(f'replaying {len(self._samples)} data bindings from {path} at {speed}x')
+
+    @classmethod
+    def from_settings(cls):
+        settings = carb.settings.get_settings()
+        return ReplayDataSource(settings.get(REPLAY_PATH_SETTING),
+                                settings.get(REPLAY_SPEED_SETTING) or 1.0,
+                                bool(settings.get(REPLAY_LOOP_SETTING)))
+
+    def _to_recording_time(self, wall_time):
+        return self._recording_start + (wall_time - self._replay_start) * self._speed
+
+    def _to_wall_time(self, recording_time):
+        return self._replay_start + (recording_time - self._recording_start) / self._speed
+
+    def get_entity_property_types(self, entity_id):
+        if entity_id not in self._property_types:
+            raise Exception(f'Entity not found in recording: {entity_id}')
+        return self._property_types[entity_id]
+
+    def _get_samples(self, databinding, start, end):
+        timestamps, values = self._samples.get(databinding, ([], []))
+        lo = bisect.bisect_left(timestamps, start)
+        hi = bisect.bisect_right(timestamps, end)
+        return [(timestamps[i], values[i]) for i in range(lo, hi)]
+
+    def get_property_values(self, data_bindings, data_types, start_time, end_time):
+        start = self._to_recording_time(iso_to_epoch(start_time))
+        end = self._to_recording_time(iso_to_epoch(end_time))
+        history = {}
+        for d in data_bindings:
+            samples = []
+            if self._loop and self._recording_duration > 0:
+                # Replay each pass of the recording overlapping the window
+                first_pass = int((start - self._recording_start) // self._recording_duration)
+                last_pass = int((end - self._recording_start) // self._recording_duration)
+                for n in range(max(first_pass, 0), last_pass + 1):
+                    shift = n * self._recording_duration
+                    samples += [(t + shift, v) for t, v in self._get_samples(d, start - shift, end - shift)]
+            else:
+                samples = self._get_samples(d, start, end)
+            history[d] = [DataPoint(self._to_wall_time(t), v) for t, v in reversed(samples)]
+        return history
+
+    def get_latest_property_values(self, data_bindings, data_types, start_time, end_time):
+        start = self._to_recording_time(iso_to_epoch(start_time))
+        end = self._to_recording_time(iso_to_epoch(end_time))
+        latest = {}
+        for d in data_bindings:
+            latest[d] = None
+            timestamps, values = self._samples.get(d, ([], []))
+            shift = 0
+            if self._loop and self._recording_duration > 0 and end >= self._recording_start:
+                shift = ((end - self._recording_start) // self._recording_duration) * self._recording_duration
+            i = bisect.bisect_right(timestamps, end - shift) - 1
+            if i < 0 and shift > 0:
+                # Last sample of the previous pass
+                shift -= self._recording_duration
+                i = len(timestamps) - 1
+            if i >= 0 and timestamps[i] + shift >= start:
+                latest[d] = DataPoint(self._to_wall_time(timestamps[i] + shift), values[i])
+        return latest
@@ -0,0 +1,288 @@
+from threading import Lock
+import random
+import time
+import carb
+import carb.settings
+
+from omni.iot.twinmaker.metrics import get_metrics
+from omni.iot.twinmaker.utils.profiler_utils import profile_zone
+from omni.iot.twinmaker.constants import REQUESTS_RATE_SETTING, REQUESTS_BURST_SETTING, REQUESTS_MAX_RETRIES_SETTING, \
+    REQUESTS_BASE_DELAY_SETTING, REQUESTS_MAX_DELAY_SETTING, REQUESTS_MAX_WAIT_SETTING, CIRCUIT_FAILURE_THRESHOLD_SETTING, \
+    CIRCUIT_RESET_TIMEOUT_SETTING
+
+DEFAULT_RATE = 10
+DEFAULT_BURST = 20
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BASE_DELAY = 0.2
+DEFAULT_MAX_DELAY = 5
+DEFAULT_MAX_WAIT = 1
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30
+
+RETRYABLE_ERROR_CODES = {
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'RequestLimitExceeded',
+    'InternalServerException',
+    'ServiceUnavailableException'
+}
+RETRYABLE_ERROR_TYPES = {
+    'EndpointConnectionError',
+    'ConnectTimeoutError',
+    'ReadTimeoutError',
+    'ConnectionClosedError'
+}
+
+
+class RequestRejectedError(Exception):
+    """Request not sent, to try again on a later fetch cycle"""
+    pass
+
+
+class CircuitOpenError(RequestRejectedError):
+    pass
+
+
+class RateLimitedError(RequestRejectedError):
+    pass
+
+
+def get_error_code(error):
+    response = getattr(error, 'response', None)
+    if isinstance(response, dict):
+        return response.get('Error', {}).get('Code')
+    return None
+
+
+def is_retryable(error):
+    return get_error_code(error) in RETRYABLE_ERROR_CODES or type(error).__name__ in RETRYABLE_ERROR_TYPES
+
+
+def is_throttling(error):
+    return get_error_code(error) in ('ThrottlingException', 'TooManyRequestsException', 'RequestLimitExceeded')
+
+
+class TokenBucket:
+    """
+    Rate limit shared by threads. The rate is halved on throttling, down to a tenth of the configured rate,
+    and recovers by 10% of the configured rate on each successful request.
+    """
+    def __init__(self, rate, burst):
+        self._max_rate = rate
+        self._rate = rate
+        self._burst = burst
+        self._tokens = burst
+        self._last_refill = time.monotonic()
+        self._lock = Lock()
+
+    @property
+    def rate(self):
+        return self._rate
+
+    def _refill(self, now):
+        self._tokens = min(self._burst, self._tokens + (now - self._last_refill) * self._rate)
+        self._last_refill = now
+
+    def acquire(self, max_wait):
+        """Take a token, waiting at most max_wait seconds for it. Return the time waited, or None without a token."""
+        waited = 0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) / self._rate
+            if waited + wait > max_wait:
+                return None
+            time.sleep(wait)
+            waited += wait
+
+    def on_throttled(self):
+        with self._lock:
+            self._rate = max(self._max_rate / 10, self._rate / 2)
+
+    def on_success(self):
+        if self._rate < self._max_rate:
+            with self._lock:
+                self._rate = min(self._max_rate, self._rate + self._max_rate / 10)
+
+
+class CircuitBreaker:
+    """
+    Stop calling a failing target after failure_threshold consecutive failures. After reset_timeout seconds
+    a single trial request is let through, which closes the circuit on success or opens it again on failure.
+    """
+    def __init__(self, failure_threshold, reset_timeout):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_progress = False
+        self._lock = Lock()
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_in_progress or self._opened_at + self._reset_timeout > time.monotonic():
+                return False
+            self._trial_in_progress = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_progress = False
+
+    # End a trial without recording its result, for requests that were not sent or were throttled
+    def release_trial(self):
+        with self._lock:
+            self._trial_in_progress = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_progress = False
+            if self._opened_at is not None or self._failures >= self._failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class RequestScheduler:
+    """
+    Run data source requests of a workspace under a token bucket rate limit, retrying retryable errors
+    with exponential backoff and full jitter, with a circuit breaker per entity. A call waits at most max_wait seconds
+    for tokens and retries in total, so requests over the rate limit do not hold the executor threads: they raise
+    RateLimitedError and are sent again on a later fetch cycle.
+    """
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, max_retries=DEFAULT_MAX_RETRIES,
+                 base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY, max_wait=DEFAULT_MAX_WAIT,
+                 failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT):
+        self._bucket = TokenBucket(rate, burst)
+        self._max_retries = max_retries
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._max_wait = max_wait
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._breakers = dict()
+        self._lock = Lock()
+
+    @classmethod
+    def from_settings(cls):
+        settings = carb.settings.get_settings()
+        return RequestScheduler(settings.get(REQUESTS_RATE_SETTING) or DEFAULT_RATE,
+                                settings.get(REQUESTS_BURST_SETTING) or DEFAULT_BURST,
+                                settings.get(REQUESTS_MAX_RETRIES_SETTING) or DEFAULT_MAX_RETRIES,
+                                settings.get(REQUESTS_BASE_DELAY_SETTING) or DEFAULT_BASE_DELAY,
+                                settings.get(REQUESTS_MAX_DELAY_SETTING) or DEFAULT_MAX_DELAY,
+                                settings.get(REQUESTS_MAX_WAIT_SETTING) or DEFAULT_MAX_WAIT,
+                                settings.get(CIRCUIT_FAILURE_THRESHOLD_SETTING) or DEFAULT_FAILURE_THRESHOLD,
+                                settings.get(CIRCUIT_RESET_TIMEOUT_SETTING) or DEFAULT_RESET_TIMEOUT)
+
+    def _get_breaker(self, key):
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(self._failure_threshold, self._reset_timeout)
+                self._breakers[key] = breaker
+            return breaker
+
+    def is_open(self, key):
+        breaker = self._breakers.get(key)
+        return breaker is not None and breaker.is_open
+
+    def call(self, key, fn, *args, **kwargs):
+        """Call fn for the circuit of key (an entityId), raise CircuitOpenError if the circuit is open"""
+        metrics = get_metrics()
+        call_name = getattr(fn, '__name__', 'call')
+        call_labels = (('call', call_name),)
+        breaker = self._get_breaker(key)
+        if not breaker.allow():
+            metrics.increment('twinmaker_api_calls_rejected_total', 'Calls rejected by an open circuit', call_labels)
+            raise CircuitOpenError(f'circuit open for {key}')
+
+        attempt = 0
+        # Seconds left to wait for tokens and retries
+        wait_budget = self._max_wait
+        while True:
+            waited = self._bucket.acquire(wait_budget)
+            if waited is None:
+                # Let the next trial through, nothing was sent
+                breaker.release_trial()
+                metrics.increment('twinmaker_api_calls_rate_limited_total', 'Calls deferred by the rate limit',
+                                  call_labels)
+                raise RateLimitedError(f'rate limit reached for {key}')
+            wait_budget -= waited
+            call_start = time.monotonic()
+            try:
+                with profile_zone(f'TwinMaker::{call_name}'):
+                    result = fn(*args, **kwargs)
+            except Exception as e:
+                metrics.observe('twinmaker_api_call_seconds', 'Latency of data source calls',
+                                time.monotonic() - call_start, call_labels)
+                metrics.increment('twinmaker_api_call_errors_total', 'Failed data source calls, retries included',
+                                  call_labels + (('error', get_error_code(e) or type(e).__name__),))
+                throttled = is_throttling(e)
+                if throttled:
+                    self._bucket.on_throttled()
+                if not is_retryable(e) or attempt >= self._max_retries or wait_budget <= 0:
+                    # Throttling is workspace wide, it does not tell that the entity fails
+                    if throttled:
+                        breaker.release_trial()
+                        raise RateLimitedError(f'throttled requesting {key}') from e
+                    breaker.record_failure()
+                    raise
+                delay = random.uniform(0, min(self._max_delay, self._base_delay * (2 ** attempt), wait_budget))
+                carb.log_warn(f'request for {key} failed with {type(e).__name__}, retrying in {delay:.2f}s')
+                attempt += 1
+                wait_budget -= delay
+                time.sleep(delay)
+                continue
+            metrics.observe('twinmaker_api_call_seconds', 'Latency of data source calls',
+                            time.monotonic() - call_start, call_labels)
+            self._bucket.on_success()
+            breaker.record_success()
+            return result
+
+
+class PassThroughScheduler:
+    """Request scheduler of local data sources, which are not rate limited and do not fail like a service"""
+
+    def is_open(self, key):
+        return False
+
+    def call(self, key, fn, *args, **kwargs):
+        call_name = getattr(fn, '__name__', 'call')
+        call_start = time.monotonic()
+        try:
+            with profile_zone(f'TwinMaker::{call_name}'):
+                return fn(*args, **kwargs)
+        finally:
+            get_metrics().observe('twinmaker_api_call_seconds', 'Latency of data source calls',
+                                  time.monotonic() - call_start, (('call', call_name),))
+
+
+_schedulers = dict()
+_schedulers_lock = Lock()
+
+
+def get_request_scheduler(workspace_id, data_source=None):
+    """
+    Return the request scheduler shared by all requests to a workspace, or a pass through scheduler when data_source
+    is a local data source
+    """
+    if data_source is not None and not data_source.remote:
+        return PassThroughScheduler()
+    with _schedulers_lock:
+        scheduler = _schedulers.get(workspace_id)
+        if scheduler is None:
+            scheduler = RequestScheduler.from_settings()
+            _schedulers[workspace_id] = scheduler
+        return scheduler
@@ -0,0 +1,136 @@
+import bisect
+import carb
+import numpy as np
+from pxr import Sdf
+
+from omni.iot.twinmaker.utils.omni_utils import hex_to_vec_3
+from omni.iot.twinmaker.utils.twinmaker_utils import evaluate_rule, RULE_OPERATORS
+
+NO_MATCH = -1
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, np.number))
+
+
+class CompiledRuleSet:
+    """
+    Rule expressions compiled once, evaluated with the same first match result as evaluate_rule.
+    Numeric comparisons become a table of the sorted thresholds and of the first matched rule below, at and between
+    each threshold, so evaluating a value is a bisection. Equality comparisons only become a hash lookup.
+    Other rule sets, or values of another type than the rule values, fall back to evaluate_rule.
+    """
+    __slots__ = ('rules', 'targets', 'thresholds', 'regions', '_threshold_list', '_region_list', '_equalities')
+
+    def __init__(self, rules, targets=()):
+        self.rules = rules
+        # (color, material path) of each rule, None when the rule does not change it
+        self.targets = targets
+        self.thresholds = None
+        self.regions = None
+        self._equalities = None
+        if len(rules) == 0 or any(rule.rule_op not in RULE_OPERATORS for rule in rules):
+            return
+        if all(_is_number(rule.rule_val) and rule.rule_val == rule.rule_val for rule in rules):
+            self._compile_thresholds()
+        elif all(rule.rule_op == '==' for rule in rules):
+            self._equalities = dict()
+            for i, rule in enumerate(rules):
+                self._equalities.setdefault(rule.rule_val, i)
+
+    def _compile_thresholds(self):
+        thresholds = np.unique(np.array([rule.rule_val for rule in self.rules], dtype=np.float64))
+        # One point in each of the 2m + 1 regions: below the first threshold, then at and above each threshold.
+        # The point above a threshold is the next float, below the next threshold.
+        points = [np.nextafter(thresholds[0], -np.inf)]
+        for t in thresholds:
+            points += [t, np.nextafter(t, np.inf)]
+        self.thresholds = thresholds
+        self.regions = np.array([evaluate_rule(self.rules, float(p)) for p in points], dtype=np.int32)
+        self._threshold_list = thresholds.tolist()
+        self._region_list = self.regions.tolist()
+
+    def evaluate(self, value):
+        """Return the index of the first rule matched by value, NO_MATCH if none"""
+        if self.thresholds is not None and _is_number(value):
+            # NaN matches no comparison
+            if value != value:
+                return NO_MATCH
+            i = bisect.bisect_left(self._threshold_list, value)
+            return self._region_list[2 * i + (i < len(self._threshold_list) and self._threshold_list[i] == value)]
+        if self._equalities is not None:
+            try:
+                return self._equalities.get(value, NO_MATCH)
+            except TypeError:
+                pass
+        return evaluate_rule(self.rules, value)
+
+    def evaluate_array(self, values):
+        """Vectorized evaluate of a float64 array, for rule sets with thresholds"""
+        i = np.searchsorted(self.thresholds, values, side='left')
+        at_threshold = self.thresholds[np.minimum(i, len(self.thresholds) - 1)] == values
+        matched = self.regions[2 * i + at_threshold]
+        return np.where(np.isnan(values), NO_MATCH, matched)
+
+
+class RuleEngine:
+    """
+    Compiled rule sets, shared by the prims with the same rules and targets, and their batch evaluation.
+    Rule sets are referenced by the id returned by compile.
+    """
+    def __init__(self):
+        self._rule_sets = []
+        # (rules, colors, material paths) -> rule set id
+        self._ids = dict()
+
+    def compile(self, rules, colors, material_paths):
+        """
+        Return the id of the rule set of the rule expressions, compiling it on first use. colors and material_paths
+        are the hex color and material path of each rule as stored on the prim, 'NONE' when not set.
+        """
+        key = (tuple((rule.rule_op, rule.rule_val) for rule in rules), tuple(colors), tuple(material_paths))
+        rule_set_id = self._ids.get(key)
+        if rule_set_id is None:
+            targets = tuple((None if color == 'NONE' else hex_to_vec_3(color),
+                             None if material_path == 'NONE' else Sdf.Path(material_path))
+                            for color, material_path in zip(colors, material_paths))
+            rule_set_id = len(self._rule_sets)
+            self._rule_sets.append(CompiledRuleSet(rules, targets))
+            self._ids[key] = rule_set_id
+        return rule_set_id
+
+    def get(self, rule_set_id) -> CompiledRuleSet:
+        return self._rule_sets[rule_set_id]
+
+    def __len__(self):
+        return len(self._rule_sets)
+
+    def evaluate(self, rule_set_ids, values):
+        """
+        Return the index of the first matched rule of each value against the rule set of the same index,
+        NO_MATCH if none. rule_set_ids is an int array, the numeric values of each rule set are evaluated at once.
+        """
+        matched = np.full(len(values), NO_MATCH, dtype=np.int32)
+        if len(values) == 0:
+            return matched
+        numeric = np.array([_is_number(v) for v in values], dtype=bool)
+        float_values = np.array([v if n else np.nan for v, n in zip(values, numeric)], dtype=np.float64)
+
+        # Rows of each rule set, from the rule set ids sorted once
+        order = np.argsort(rule_set_ids, kind='stable')
+        sorted_ids = rule_set_ids[order]
+        starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+        ends = np.r_[starts[1:], len(order)]
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            rule_set = self._rule_sets[sorted_ids[start]]
+            rows = order[start:end]
+            if rule_set.thresholds is not None:
+                numeric_rows = rows[numeric[rows]]
+                matched[numeric_rows] = rule_set.evaluate_array(float_values[numeric_rows])
+                rows = rows[~numeric[rows]]
+            for i in rows.tolist():
+                try:
+                    matched[i] = rule_set.evaluate(values[i])
+                except Exception as e:
+                    carb.log_error(f'failed to evaluate {rule_set.rules} with {values[i]}, error: {e}')
+        return matched
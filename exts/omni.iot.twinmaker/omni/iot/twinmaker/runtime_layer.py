@@ -0,0 +1,95 @@
+import carb
+from pxr import Sdf
+
+from omni.iot.twinmaker.utils.profiler_utils import profiled
+
+RUNTIME_LAYER_TAG = 'twinmaker_runtime'
+# Queued edit removing the runtime value of a property
+_CLEAR = object()
+
+
+class RuntimeLayer:
+    """
+    Anonymous sublayer of the session layer holding the values written by the widgets while playing. Writes are
+    queued and applied once per frame in one Sdf.ChangeBlock, through specs cached per property path, so a frame of
+    changes is a single change notification. The authored scene is never edited, and removing the layer
+    restores its values.
+    """
+    def __init__(self, stage):
+        self._stage = stage
+        self._layer = Sdf.Layer.CreateAnonymous(RUNTIME_LAYER_TAG)
+        # Strongest sublayer of the session layer, above the root layer stack
+        stage.GetSessionLayer().subLayerPaths.insert(0, self._layer.identifier)
+        # property path -> attribute or relationship spec
+        self._specs = dict()
+        # property path -> (type name, value) of attributes, (None, target path) of relationships, or _CLEAR.
+        # The last edit of a frame wins.
+        self._pending = dict()
+
+    @property
+    def layer(self):
+        return self._layer
+
+    def set(self, attribute_path: Sdf.Path, type_name, value):
+        """Queue the value of an attribute, written on the next flush"""
+        self._pending[attribute_path] = (type_name, value)
+
+    def set_target(self, relationship_path: Sdf.Path, target_path: Sdf.Path):
+        """Queue the target of a relationship, written on the next flush"""
+        self._pending[relationship_path] = (None, target_path)
+
+    def clear(self, property_path: Sdf.Path):
+        """Queue dropping the runtime value of a property, back to its authored value on the next flush"""
+        if property_path in self._specs:
+            self._pending[property_path] = _CLEAR
+        else:
+            self._pending.pop(property_path, None)
+
+    @profiled('TwinMaker::RuntimeLayer.flush')
+    def flush(self):
+        """Write the queued values in one change block, called once per frame"""
+        if len(self._pending) == 0:
+            return
+        pending, self._pending = self._pending, dict()
+        with Sdf.ChangeBlock():
+            for path, edit in pending.items():
+                # A failed write only drops the edit of its property
+                try:
+                    self._apply(path, edit)
+                except Exception as e:
+                    carb.log_error(f'failed to write {path} to the runtime layer, error: {e}')
+
+    def _apply(self, path, edit):
+        if edit is _CLEAR:
+            spec = self._specs.pop(path, None)
+            if spec is not None:
+                spec.owner.RemoveProperty(spec)
+            return
+        type_name, value = edit
+        spec = self._specs.get(path)
+        if spec is None:
+            spec = self._create_spec(path, type_name)
+            self._specs[path] = spec
+        if type_name is None:
+            spec.targetPathList.explicitItems = [value]
+        else:
+            spec.default = value
+
+    def _create_spec(self, path, type_name):
+        prim_spec = Sdf.CreatePrimInLayer(self._layer, path.GetPrimPath())
+        if type_name is None:
+            spec = self._layer.GetRelationshipAtPath(path) or Sdf.RelationshipSpec(prim_spec, path.name, custom=False)
+            # Same binding strength as BindMaterialCommand
+            spec.SetInfo('bindMaterialAs', 'strongerThanDescendants')
+            return spec
+        return self._layer.GetAttributeAtPath(path) or Sdf.AttributeSpec(prim_spec, path.name, type_name)
+
+    def destroy(self):
+        """Remove the layer and its values from the stage"""
+        self._pending = dict()
+        self._specs = dict()
+        self._layer.Clear()
+        if not self._stage.expired:
+            sublayers = self._stage.GetSessionLayer().subLayerPaths
+            if self._layer.identifier in sublayers:
+                sublayers.remove(self._layer.identifier)
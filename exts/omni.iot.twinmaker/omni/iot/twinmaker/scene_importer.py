@@ -1,5 +1,6 @@
 import os
 import json
+import asyncio
 
 import omni.kit.asset_converter as converter
 import omni.kit.commands
@@ -8,7 +9,10 @@ import omni.usd
 from omni.iot.twinmaker.utils.omni_utils import add_model_reference, add_prim
 from omni.iot.twinmaker.utils.prim_transform_utils import TUtil_SetTranslate, TUtil_SetRotateQuat, TUtil_SetScale
 from omni.iot.twinmaker.utils.aws_utils import get_aws_client
+from omni.iot.twinmaker.utils.omni_utils import get_global_config
+from omni.iot.twinmaker.metadata import EntityMetadataCache
 from omni.iot.twinmaker.tag import Tag
+from omni.iot.twinmaker.utils.profiler_utils import profile_zone, profiled
 
 DEFAULT_ASSUME_ROLE_ARN = '[ASSUME_ROLE_ARN]'
 
@@ -36,6 +40,7 @@ class SceneImporter:
         self._workspace_bucket = workspace_bucket_arn.split(':::')[1]
 
     # Load scene JSON of sceneId into memory
+    @profiled('TwinMaker::SceneImporter.load_scene')
     def load_scene(self, scene_id):
         print(f'Loading scene {scene_id}')
         # Get scene JSON path in the workspace S3 bucket
@@ -58,6 +63,21 @@ class SceneImporter:
         node_len = len(self._scene_json['nodes'])
         print(f'Loaded scene {scene_id} with {node_len} nodes')
 
+    # Load entity metadata of all tags in the background so their data types are known when play starts
+    def __preload_tag_metadata(self):
+        global_config = get_global_config()
+        if global_config is None or global_config['workspace_id'] != self._workspace_id:
+            return
+
+        entity_ids = set()
+        for node in self._scene_json['nodes']:
+            for component in node['components']:
+                if 'valueDataBinding' in component and component['type'] == 'Tag':
+                    entity_ids.add(component['valueDataBinding']['dataBindingContext']['entityId'])
+        if len(entity_ids) > 0:
+            loop = asyncio.get_event_loop()
+            loop.run_in_executor(None, EntityMetadataCache.get_instance().load, list(entity_ids))
+
     def __import_progress_callback(self, current_step: int, total: int):
         print(f"{current_step} of {total}")
 
@@ -66,11 +86,12 @@ class SceneImporter:
         model_already_downloaded = os.path.isfile(model_path)
         if not model_already_downloaded:
             print(f'Loading model from S3: {model_path}')
-            self._s3_client.download_file(
-                self._workspace_bucket,
-                model_path,
-                model_path
-            )
+            with profile_zone('TwinMaker::SceneImporter.load_model'):
+                self._s3_client.download_file(
+                    self._workspace_bucket,
+                    model_path,
+                    model_path
+                )
 
     def __convert_file_name(self, file_path, file_format):
         file_name = file_path.split('.')[-2]
@@ -84,11 +105,13 @@ class SceneImporter:
         if model_already_imported:
             return output_path
 
-        task = task_manager.create_converter_task(
-            model_path,
-            output_path,
-            self.__import_progress_callback
-        )
+        # The conversion itself runs in the converter, only its creation takes frame time
+        with profile_zone('TwinMaker::SceneImporter.convert_to_usd'):
+            task = task_manager.create_converter_task(
+                model_path,
+                output_path,
+                self.__import_progress_callback
+            )
         success = await task.wait_until_finished()
         if not success:
             print(f'Failed to load file: {model_path}')
@@ -135,6 +158,7 @@ class SceneImporter:
 
     async def import_scene_assets(self):
         print('Importing 3D assets for scene')
+        self.__preload_tag_metadata()
         nodes = self._scene_json['nodes']
         # Add empty transform as a parent of all tags
         add_prim('/World/Tags', 'Xform')
@@ -149,24 +173,27 @@ class SceneImporter:
                     # 2. Convert model to USD
                     usd_file_path = await self.__convert_to_usd(model_path)
                     # 3. Add reference to local USD in stage hierarchy
-                    prim_path = self.__generate_reference_path(i)
-                    add_model_reference(prim_path, usd_file_path)
-                    # 4. Get reference prim to transform it
-                    model_prim = self.__get_prim(prim_path)
+                    with profile_zone('TwinMaker::SceneImporter.add_reference'):
+                        prim_path = self.__generate_reference_path(i)
+                        add_model_reference(prim_path, usd_file_path)
+                        # 4. Get reference prim to transform it
+                        model_prim = self.__get_prim(prim_path)
                 elif 'valueDataBinding' in component and component['type'] == 'Tag':
-                    parent_node = nodes[node['parent']]
-                    # Assuming parent is parsed before child, get the name of the model the tag is attached to
-                    prim_name = parent_node['name']
-                    prim_path = f'/World/Tags/{prim_name}'
-                    tag = Tag(component['valueDataBinding']['dataBindingContext'], prim_path)
-                    tag.set_transform(parent_node['transform'], node['transform'])
-
-            if model_prim is not None:
-                transform = node['transform']
-                TUtil_SetTranslate(model_prim, transform['position'])
-                TUtil_SetRotateQuat(model_prim, transform['rotation'])
-                TUtil_SetScale(model_prim, transform['scale'])
-            # Add empty transform
-            elif 'children' in node:
-                prim_path = self.__generate_reference_path(i)
-                add_prim(prim_path, 'Xform')
+                    with profile_zone('TwinMaker::SceneImporter.add_tag'):
+                        parent_node = nodes[node['parent']]
+                        # Assuming parent is parsed before child, get the name of the model the tag is attached to
+                        prim_name = parent_node['name']
+                        prim_path = f'/World/Tags/{prim_name}'
+                        tag = Tag(component['valueDataBinding']['dataBindingContext'], prim_path)
+                        tag.set_transform(parent_node['transform'], node['transform'])
+
+            with profile_zone('TwinMaker::SceneImporter.set_transform'):
+                if model_prim is not None:
+                    transform = node['transform']
+                    TUtil_SetTranslate(model_prim, transform['position'])
+                    TUtil_SetRotateQuat(model_prim, transform['rotation'])
+                    TUtil_SetScale(model_prim, transform['scale'])
+                # Add empty transform
+                elif 'children' in node:
+                    prim_path = self.__generate_reference_path(i)
+                    add_prim(prim_path, 'Xform')
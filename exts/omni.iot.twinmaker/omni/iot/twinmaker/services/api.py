@@ -6,6 +6,9 @@ from pxr import Usd, Sdf
 
 from typing import Optional
 from pydantic import BaseModel, Field
+from fastapi.responses import PlainTextResponse, JSONResponse
+
+from omni.iot.twinmaker.metrics import get_metrics
 
 import carb
 http_server_port = carb.settings.get_settings().get_as_int("exts/omni.services.transport.server.http/port")
@@ -110,3 +113,17 @@ def set_selected_entity(request: SetSelectedEntityRequestModel) -> SetSelectedEn
         return SetSelectedEntityResponseModel(success=True)
     else:
         return SetSelectedEntityResponseModel(success=False)
+
+
+@router.get(
+    "/metrics",
+    summary="Return performance metrics.",
+    description="Return fetch, data source call and frame update metrics in the Prometheus text format, "
+                "or as JSON with format=json.",
+)
+# Async so that the gauge collectors run on the Kit main thread, which owns the state they read
+async def get_performance_metrics(format: str = "prometheus"):
+    metrics = get_metrics()
+    if format == "json":
+        return JSONResponse(metrics.to_dict())
+    return PlainTextResponse(metrics.to_prometheus(), media_type="text/plain; version=0.0.4")
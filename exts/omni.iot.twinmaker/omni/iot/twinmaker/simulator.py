@@ -0,0 +1,209 @@
+from threading import Lock
+import json
+import math
+import zlib
+import numpy as np
+import carb
+import carb.settings
+
+from omni.iot.twinmaker.data_models import DataBinding, DataPoint
+from omni.iot.twinmaker.data_source import DataSource
+from omni.iot.twinmaker.constants import ENTITY_ATTR, COMPONENT_ATTR, PROPERTY_ATTR, SIMULATOR_RATE_SETTING, \
+    SIMULATOR_SEED_SETTING, SIMULATOR_SIGNALS_SETTING
+from omni.iot.twinmaker.utils.twinmaker_utils import iso_to_epoch
+
+DEFAULT_SAMPLE_RATE = 1.0
+DEFAULT_SIGNAL = {'signal': 'random_walk', 'start': 50, 'step': 1, 'min': 0, 'max': 100}
+# Random walk values kept to answer overlapping fetch windows
+RANDOM_WALK_RETAINED_SAMPLES = 10000
+
+
+class StepSignal:
+    """Square wave alternating between low and high every half period"""
+    data_type = 'DOUBLE'
+
+    def __init__(self, low=0, high=1, period=60, **kwargs):
+        self._low = low
+        self._high = high
+        self._period = period
+
+    def values(self, indices, times):
+        return np.where((times % self._period) < self._period / 2, self._low, self._high)
+
+
+class RampSignal:
+    """Sawtooth rising from min to max over each period"""
+    data_type = 'DOUBLE'
+
+    def __init__(self, min=0, max=100, period=60, **kwargs):
+        self._min = min
+        self._max = max
+        self._period = period
+
+    def values(self, indices, times):
+        return self._min + (self._max - self._min) * (times % self._period) / self._period
+
+
+class EnumSignal:
+    """Pseudo-random state out of a list of values, changing every period"""
+    def __init__(self, values=('ACTIVE', 'NORMAL'), period=30, seed=0, **kwargs):
+        self._values = np.array(values)
+        self._period = period
+        self._seed = seed
+        self.data_type = 'STRING' if isinstance(values[0], str) else 'DOUBLE'
+
+    def values(self, indices, times):
+        slots = (times // self._period).astype(np.uint64)
+        # Knuth multiplicative hash of the period slot
+        codes = (slots * np.uint64(2654435761) + np.uint64(self._seed)) % np.uint64(2 ** 32)
+        return self._values[(codes % np.uint64(len(self._values))).astype(np.int64)]
+
+
+class RandomWalkSignal:
+    """Random walk clamped between min and max, deterministic for a given seed"""
+    data_type = 'DOUBLE'
+
+    def __init__(self, start=0, step=1, min=-math.inf, max=math.inf, seed=0, **kwargs):
+        self._start = start
+        self._step = step
+        self._min = min
+        self._max = max
+        self._rng = np.random.default_rng(seed)
+        self._lock = Lock()
+        # Values of the sample indices [_first_index, _first_index + len(_values))
+        self._first_index = None
+        self._values = np.zeros(0)
+
+    def _generate_until(self, index):
+        last_index = self._first_index + len(self._values) - 1
+        if index <= last_index:
+            return
+        last_value = self._values[-1] if len(self._values) > 0 else self._start
+        steps = self._rng.uniform(-self._step, self._step, index - last_index)
+        values = np.clip(last_value + np.cumsum(steps), self._min, self._max)
+        self._values = np.concatenate((self._values, values))[-RANDOM_WALK_RETAINED_SAMPLES:]
+        self._first_index = index + 1 - len(self._values)
+
+    def values(self, indices, times):
+        with self._lock:
+            if self._first_index is None:
+                self._first_index = int(indices[0])
+            self._generate_until(int(indices[-1]))
+            # Samples older than the retained values are reported at the oldest retained value
+            offsets = np.clip(indices - self._first_index, 0, len(self._values) - 1)
+            return self._values[offsets]
+
+
+SIGNALS = {
+    'step': StepSignal,
+    'ramp': RampSignal,
+    'enum': EnumSignal,
+    'random_walk': RandomWalkSignal
+}
+
+
+class _SimulatedProperties(dict):
+    def __init__(self, simulator, entity_id, component_name):
+        super().__init__()
+        self._simulator = simulator
+        self._entity_id = entity_id
+        self._component_name = component_name
+
+    def __missing__(self, property_name):
+        databinding = DataBinding(self._entity_id, self._component_name, property_name)
+        return self._simulator.get_signal(databinding).data_type
+
+
+class _SimulatedComponents(dict):
+    def __init__(self, simulator, entity_id):
+        super().__init__()
+        self._simulator = simulator
+        self._entity_id = entity_id
+
+    def __missing__(self, component_name):
+        return _SimulatedProperties(self._simulator, self._entity_id, component_name)
+
+
+class SimulatorDataSource(DataSource):
+    """
+    In-process data source generating property values sampled at a fixed rate, to run the data pipeline without AWS.
+    Every entity exists and has every property. The signal of a property is given by the first matching
+    entry of the signal specs, for example:
+        [{"entityId": "conveyorEntityId", "propertyName": "OperationalStatus", "signal": "enum", "values": [0, 1, 2]},
+         {"propertyName": "PackagesPerHour", "signal": "ramp", "min": 0, "max": 200, "period": 120}]
+    Missing entityId, componentName or propertyName match any value.
+    """
+    def __init__(self, signal_specs=None, sample_rate=DEFAULT_SAMPLE_RATE, seed=0):
+        self._signal_specs = signal_specs or []
+        self._sample_rate = sample_rate
+        self._seed = seed
+        self._signals = dict()
+        self._lock = Lock()
+
+    @classmethod
+    def from_settings(cls):
+        settings = carb.settings.get_settings()
+        signal_specs = None
+        signals_path = settings.get(SIMULATOR_SIGNALS_SETTING)
+        if signals_path:
+            with open(signals_path) as file:
+                signal_specs = json.load(file)
+        return SimulatorDataSource(signal_specs,
+                                   settings.get(SIMULATOR_RATE_SETTING) or DEFAULT_SAMPLE_RATE,
+                                   settings.get(SIMULATOR_SEED_SETTING) or 0)
+
+    def _get_signal_spec(self, databinding):
+        for spec in self._signal_specs:
+            if spec.get(ENTITY_ATTR, databinding.entity_id) == databinding.entity_id and \
+                spec.get(COMPONENT_ATTR, databinding.component_name) == databinding.component_name and \
+                    spec.get(PROPERTY_ATTR, databinding.property_name) == databinding.property_name:
+                return spec
+        return DEFAULT_SIGNAL
+
+    def get_signal(self, databinding):
+        with self._lock:
+            signal = self._signals.get(databinding)
+            if signal is None:
+                spec = self._get_signal_spec(databinding)
+                params = {k: v for k, v in spec.items() if k not in (ENTITY_ATTR, COMPONENT_ATTR, PROPERTY_ATTR, 'signal')}
+                # Stable seed per data binding, hash() of strings changes between sessions
+                params.setdefault('seed', self._seed + zlib.crc32(repr(databinding).encode('utf-8')))
+                signal = SIGNALS[spec['signal']](**params)
+                self._signals[databinding] = signal
+            return signal
+
+    def get_entity_property_types(self, entity_id):
+        return _SimulatedComponents(self, entity_id)
+
+    def get_property_values(self, data_bindings, data_types, start_time, end_time):
+        first_index = math.ceil(iso_to_epoch(start_time) * self._sample_rate)
+        last_index = math.floor(iso_to_epoch(end_time) * self._sample_rate)
+        if last_index < first_index:
+            return {d: [] for d in data_bindings}
+
+        # Latest first
+        indices = np.arange(last_index, first_index - 1, -1, dtype=np.int64)
+        times = indices / self._sample_rate
+        timestamps = times.tolist()
+        history = {}
+        for d in data_bindings:
+            values = self.get_signal(d).values(indices[::-1], times[::-1])[::-1]
+            if data_types[d] == 'stringValue':
+                values = [str(v) for v in values.tolist()]
+            else:
+                values = values.astype(np.float64).tolist()
+            history[d] = [DataPoint(t, v) for t, v in zip(timestamps, values)]
+        return history
+
+    def get_latest_property_values(self, data_bindings, data_types, start_time, end_time):
+        index = math.floor(iso_to_epoch(end_time) * self._sample_rate)
+        if index < math.ceil(iso_to_epoch(start_time) * self._sample_rate):
+            return {d: None for d in data_bindings}
+        indices = np.array([index], dtype=np.int64)
+        times = indices / self._sample_rate
+        latest = {}
+        for d in data_bindings:
+            value = self.get_signal(d).values(indices, times)[0]
+            value = str(value) if data_types[d] == 'stringValue' else float(value)
+            latest[d] = DataPoint(times[0].item(), value)
+        return latest
@@ -1,48 +1,143 @@
 from __future__ import annotations
 
 from concurrent.futures import ThreadPoolExecutor
-from threading import Timer
+from types import MappingProxyType
 from datetime import datetime, timedelta
 import asyncio
+import time
+import numpy as np
 import carb
+import carb.settings
 
 import omni.kit.app
 
-from omni.iot.twinmaker.twinmaker_api import TwinMaker
+from omni.iot.twinmaker.data_source import get_data_source_name, TWINMAKER_DATA_SOURCE
 from omni.iot.twinmaker.data_models import DataBinding
+from omni.iot.twinmaker.timeseries import TimeSeriesBuffer, DEFAULT_HISTORY_CAPACITY, DEFAULT_HISTORY_HORIZON
+from omni.iot.twinmaker.metadata import EntityMetadataCache
+from omni.iot.twinmaker.polling import PollScheduler
+from omni.iot.twinmaker.request_scheduler import RequestScheduler, RequestRejectedError, get_request_scheduler
+from omni.iot.twinmaker.persistent_cache import open_persistent_cache
+from omni.iot.twinmaker.recording import Recorder
+from omni.iot.twinmaker.metrics import get_metrics, FRAME_BUCKETS
+from omni.iot.twinmaker.history_playback import HistoryPlayback
+from omni.iot.twinmaker.constants import FETCH_EXECUTOR_WORKERS, PERSISTENT_CACHE_FLUSH_INTERVAL_SETTING, HISTORY_CAPACITY_SETTING, \
+    HISTORY_HORIZON_SETTING, FETCH_MAX_LOOKBACK_SETTING, RECORDING_PATH_SETTING, SUBSCRIPTION_STATE_TTL_SETTING
 from omni.iot.twinmaker.utils.omni_utils import get_global_config
-from omni.iot.twinmaker.utils.twinmaker_utils import date_to_iso
+from omni.iot.twinmaker.utils.twinmaker_utils import epoch_to_iso
+from omni.iot.twinmaker.utils.profiler_utils import profile_zone, profiled
+
+# Seconds to look back for data bindings that have no sample yet
+DEFAULT_LOOKBACK = 60
+DEFAULT_MAX_LOOKBACK = 300
+# Seconds the state of a data binding is kept after its last subscriber left
+DEFAULT_STATE_TTL = 300
+EVICTION_CHECK_INTERVAL = 10
+
+
+class StoreSnapshot:
+    """
+    Read-only data points and versions of the store as of the end of a fetch epoch. A new snapshot replaces the
+    previous one at once, so a reader holding a snapshot sees values of the same fetch cycle without locking.
+    """
+    __slots__ = ('epoch', 'datapoints', 'versions', 'version')
+
+    def __init__(self, epoch, datapoints, versions, version):
+        self.epoch = epoch
+        self.datapoints = MappingProxyType(datapoints)
+        self.versions = MappingProxyType(versions)
+        self.version = version
+
+
+class SubscriptionHandle:
+    """Subscription of one subscriber to a data binding, returned by DataBindingStore.subscribe"""
+    __slots__ = ('databinding', 'poll_interval', 'active')
+
+    def __init__(self, databinding, poll_interval=None):
+        self.databinding = databinding
+        self.poll_interval = poll_interval
+        self.active = True
+
+    def __repr__(self):
+        return f'SubscriptionHandle({self.databinding}, {self.poll_interval})'
+
 
 class DataFetchingWorker:
     """
-    Fetch data on a given interval. Relies on threading.Timer, which runs a function once after a
-    certain number of seconds. This creates a Timer object on a regular interval to execute a given function repeatedly.
+    Fetch data of subscribed data bindings on their own poll interval. Checked on every app update,
+    each fetch cycle fetches the data bindings that are due. Fetching threads only return the new samples,
+    the main thread publishes them as a new snapshot at the end of the cycle.
     """
-    def __init__(self, interval, region, role, workspace_id):
-        self.interval = interval
+    def __init__(self, interval, data_source, metadata, batch_fetching=True, persistent_cache=None,
+                 request_scheduler=None):
+        self._scheduler = PollScheduler(interval)
+        # Group subscribed data bindings by entity and component to fetch all their properties in one call
+        self.batch_fetching = batch_fetching
 
-        self._executor = ThreadPoolExecutor(max_workers=4)
-        self._twinmaker = TwinMaker(region, role, workspace_id)
+        self._executor = ThreadPoolExecutor(max_workers=FETCH_EXECUTOR_WORKERS)
+        # Tasks submitted to the executor and not completed yet
+        self._pending_tasks = 0
+        self._data_source = data_source
+        # Rate limit, retries and per entity circuit breaking of data source requests
+        self._requests = request_scheduler if request_scheduler is not None else RequestScheduler()
+        self._metadata = metadata
         self._subscription_handle = None
 
         self._is_fetching = False
-        self._last_fetch_endtime = datetime.now() - timedelta(seconds=15)
-        self._data_fetching_tasks = set()
+        self._next_fetch_time = 0
 
-        self._subscribed_databindings = set()
+        # Replaced on every change, never modified, so fetch cycles can iterate it while subscriptions change
+        self._subscribed_databindings = frozenset()
+        # Subscription handles of each subscribed data binding, a data binding is fetched while it has one
+        self._subscribers = dict()
+        # Time.monotonic() when the last subscriber of a data binding left, its state is evicted after the state TTL
+        self._released_databindings = dict()
+        self._next_eviction_time = 0
         self._databinding_valuetype = dict()
-        self._in_mem_store = dict()
+        self._unresolvable_databindings = set()
+        self._snapshot = StoreSnapshot(0, {}, {}, 0)
+        # Time in seconds since epoch of the latest sample of each data binding
+        self._watermarks = dict()
+        # Recent samples of each data binding
+        self._history = dict()
+
+        # Records every fetched data point when set
+        self._recorder = None
+        # Serves historical values for the timeline playhead instead of fetching the latest values when set
+        self._history_playback = None
 
+        # Data bindings changed since the last dispatch of change callbacks
+        self._pending_changes = set()
+        self._change_callbacks = dict()
+        # Called once per dispatch with all changed data bindings
+        self._change_listeners = []
+
+        # Warm start from the value types and last data points of the previous session
+        self._persistent_cache = persistent_cache
+        self._last_persist_time = datetime.now()
+        if self._persistent_cache is not None:
+            self._databinding_valuetype.update(self._persistent_cache.load_value_types())
+            self._publish(self._persistent_cache.load_datapoints())
+            carb.log_info(f'loaded {len(self._databinding_valuetype)} value types and '
+                          f'{len(self._snapshot.datapoints)} data points from persistent cache')
+
+    @profiled('TwinMaker::DataFetchingWorker._on_update')
     def _on_update(self, e):
         # carb.log_info(f'on_update event: {e.payload}')
+        if self._history_playback is not None:
+            self._history_playback.update(asyncio.get_event_loop())
+            self._dispatch_changes()
+            return
+
+        self._dispatch_changes()
+        self._evict_released_databindings()
+
         # check if there is an ongoing data fetching
         if self._is_fetching:
             return
         
-        # carb.log_info(f'last fetch time {self._last_fetch_endtime}')
-
-        # check if at least interval second has passed after last fetch
-        if self._last_fetch_endtime + timedelta(seconds=self.interval) > datetime.now():
+        # check if a data binding is due
+        if self._next_fetch_time > time.monotonic():
             return
         
         # carb.log_info(f'we should fetch!')
@@ -60,54 +155,387 @@ class DataFetchingWorker:
 
     async def _async_fetch_data(self):
         loop = asyncio.get_event_loop()
-        fetch_end_time = datetime.now()
-        blocking_tasks = []
-        carb.log_info('start fetching data types')
-        carb.log_info(f'total subs {len(self._subscribed_databindings)}')
+        # Zones cannot span the await, other frames run in between
+        with profile_zone('TwinMaker::DataFetchingWorker._async_fetch_data.schedule'):
+            fetch_start = time.monotonic()
+            self._resolve_property_value_types(loop)
+            databindings = [d for d in self._subscribed_databindings if d in self._databinding_valuetype]
+            databindings = self._scheduler.get_due(databindings, fetch_start)
+
+            carb.log_info('start data fetching job')
+            carb.log_info(f'total subs {len(self._subscribed_databindings)}, {len(databindings)} due')
+            # Fetch task of each group of data bindings
+            blocking_tasks = dict()
+            end_time = time.time()
+            if self.batch_fetching:
+                groups = self._group_databindings(databindings)
+            else:
+                groups = [[d] for d in databindings]
+            for group in groups:
+                blocking_tasks[self._submit_fetch(loop, group, end_time)] = group
+            carb.log_info(f'{len(blocking_tasks)} fetch requests for {len(databindings)} subs')
+
+        done = set()
+        if len(blocking_tasks) > 0:
+            done, _ = await asyncio.wait(blocking_tasks)
+
+        with profile_zone('TwinMaker::DataFetchingWorker._async_fetch_data.commit'):
+            new_datapoints = dict()
+            fetched_databindings = []
+            for task in done:
+                error = task.exception()
+                if error is None:
+                    new_datapoints.update(task.result())
+                    fetched_databindings += blocking_tasks[task]
+                elif isinstance(error, RequestRejectedError):
+                    carb.log_info(f'skipped data fetching: {error}')
+                else:
+                    carb.log_error(f'failed to fetch data, error: {type(error).__name__}: {error}')
+
+            changed_databindings = self._commit_fetched(new_datapoints)
+
+            fetch_end = time.monotonic()
+            get_metrics().observe('twinmaker_fetch_cycle_seconds', 'Duration of fetch cycles', fetch_end - fetch_start)
+            # Data bindings of failed or rejected fetches stay due and are retried after the min interval
+            for d in fetched_databindings:
+                self._scheduler.on_fetched(d, fetch_end, d in changed_databindings)
+
+            carb.log_info('fetching data job completed')
+            self._is_fetching = False
+            # Data bindings without a data type yet are retried after the min interval
+            self._next_fetch_time = max(self._scheduler.get_next_due(), fetch_end + self._scheduler.min_interval)
+
+            if self._persistent_cache is not None and \
+                self._last_persist_time + timedelta(seconds=self._persist_interval()) <= datetime.now():
+                self._last_persist_time = datetime.now()
+                self._run_in_executor(loop, self._persistent_cache.flush)
+
+    # Run fn in the fetch executor, counting the task until it completes
+    def _run_in_executor(self, loop, fn, *args):
+        self._pending_tasks += 1
+        future = loop.run_in_executor(self._executor, fn, *args)
+        future.add_done_callback(self._on_task_done)
+        return future
+
+    def _on_task_done(self, future):
+        self._pending_tasks -= 1
+
+    def _persist_interval(self):
+        return carb.settings.get_settings().get(PERSISTENT_CACHE_FLUSH_INTERVAL_SETTING) or 10
+    
+    # Resolve data types from the shared entity metadata cache. Entities that are not cached yet are loaded
+    # in the background, their data bindings are fetched in the first cycle after the metadata arrives.
+    def _resolve_property_value_types(self, loop):
+        unresolved_entities = set()
         for d in self._subscribed_databindings:
+            if d in self._databinding_valuetype or d in self._unresolvable_databindings:
+                continue
+            try:
+                property_value_type = self._metadata.get_property_value_type(d)
+            except Exception as e:
+                carb.log_error(f'failed to resolve data type for property {d}, error: {e}')
+                self._unresolvable_databindings.add(d)
+                continue
+            if property_value_type is None:
+                unresolved_entities.add(d.entity_id)
+            else:
+                self._databinding_valuetype[d] = property_value_type
+                if self._persistent_cache is not None:
+                    self._persistent_cache.put_value_type(d, property_value_type)
+                carb.log_info(f'got data type for property {d}: {property_value_type}')
+
+        for entity_id in self._metadata.get_missing_entities(unresolved_entities):
+            self._run_in_executor(loop, self._metadata.load_entity, entity_id)
+
+    # Fetch window of a group of data bindings, starting from the oldest watermark of the group
+    def _get_fetch_window(self, databindings, end_time):
+        watermarks = [self._watermarks.get(d) for d in databindings]
+        if any(w is None for w in watermarks):
+            start_time = end_time - DEFAULT_LOOKBACK
+        else:
+            start_time = max(min(watermarks), end_time - self._max_lookback())
+        return epoch_to_iso(start_time), epoch_to_iso(end_time)
+
+    def _max_lookback(self):
+        return carb.settings.get_settings().get(FETCH_MAX_LOOKBACK_SETTING) or DEFAULT_MAX_LOOKBACK
+
+    # Submit the fetch of a group of data bindings, its window, data types and watermarks are read on the main thread
+    def _submit_fetch(self, loop, databindings, end_time):
+        starttime, endtime = self._get_fetch_window(databindings, end_time)
+        data_types = {d: self._databinding_valuetype[d] for d in databindings}
+        watermarks = {d: self._watermarks.get(d) for d in databindings}
+        return self._run_in_executor(loop, self._get_latest_property_values,
+                                     databindings, data_types, watermarks, starttime, endtime)
+
+    # Run in the fetch executor, return the new data points of each data binding, newest first.
+    # Worker state is only changed on the main thread.
+    def _get_latest_property_values(self, databindings, data_types, watermarks, starttime, endtime):
+        entity_id = databindings[0].entity_id
+        component_name = databindings[0].component_name
+        carb.log_info(f'fetching values for {len(databindings)} properties of {entity_id}/{component_name} '
+                      f'from {starttime} to {endtime}')
+        history = self._requests.call(entity_id, self._data_source.get_property_values,
+                                      databindings, data_types, starttime, endtime)
+        new_datapoints = dict()
+        for d, datapoints in history.items():
+            # Drop samples at or before the watermark, fetch windows of a group may overlap
+            watermark = watermarks.get(d)
+            if watermark is not None:
+                datapoints = [p for p in datapoints if p.timestamp > watermark]
+            # Keep the stored value when there is no new sample
+            if len(datapoints) > 0:
+                new_datapoints[d] = datapoints
+        return new_datapoints
+
+    # Called on the main thread with the new data points of each data binding fetched in a cycle, newest first,
+    # return the data bindings whose value changed
+    def _commit_fetched(self, new_datapoints):
+        # History playback started while fetching
+        if self._history_playback is not None:
+            return set()
+        changes = dict()
+        datapoints = self._snapshot.datapoints
+        for d, fetched in new_datapoints.items():
+            # Evicted while fetching
             if d not in self._databinding_valuetype:
-                blocking_tasks.append(loop.run_in_executor(self._executor, self._get_property_value_type, d))
-        
-        if len(blocking_tasks) > 0:
-            await asyncio.wait(blocking_tasks)
+                continue
+            self._append_history(d, fetched)
+            if self._recorder is not None:
+                self._recorder.record(d, fetched)
+            result = fetched[0]
+            self._watermarks[d] = result.timestamp
+            # An unchanged value is not new data
+            current = datapoints.get(d)
+            if current is not None and current.value == result.value:
+                continue
+            carb.log_info(f'got latest value for property {d}: {result}')
+            changes[d] = result
+            if self._persistent_cache is not None:
+                self._persistent_cache.put_datapoint(d, result)
+        self._publish(changes)
+        return set(changes.keys())
 
-        carb.log_info('fetching data types completed')
+    # Publish a new snapshot with the changed data points, called on the main thread
+    def _publish(self, changes):
+        if len(changes) == 0:
+            return
+        snapshot = self._snapshot
+        datapoints = dict(snapshot.datapoints)
+        datapoints.update(changes)
+        versions = dict(snapshot.versions)
+        version = snapshot.version + 1
+        for d in changes:
+            versions[d] = version
+        self._pending_changes.update(changes.keys())
+        self._snapshot = StoreSnapshot(snapshot.epoch + 1, datapoints, versions, version)
+
+    # Publish a new snapshot without the data points of the given data bindings, called on the main thread
+    def _unpublish(self, databindings):
+        snapshot = self._snapshot
+        datapoints = {d: p for d, p in snapshot.datapoints.items() if d not in databindings}
+        versions = {d: v for d, v in snapshot.versions.items() if d not in databindings}
+        self._pending_changes.difference_update(databindings)
+        self._snapshot = StoreSnapshot(snapshot.epoch + 1, datapoints, versions, snapshot.version)
+
+    def _state_ttl(self):
+        return carb.settings.get_settings().get(SUBSCRIPTION_STATE_TTL_SETTING) or DEFAULT_STATE_TTL
+
+    # Drop the state of data bindings without subscriber for longer than the state TTL
+    def _evict_released_databindings(self):
+        now = time.monotonic()
+        if self._next_eviction_time > now or len(self._released_databindings) == 0:
+            return
+        self._next_eviction_time = now + EVICTION_CHECK_INTERVAL
+        expiry = now - self._state_ttl()
+        evicted = {d for d, released_time in self._released_databindings.items() if released_time <= expiry}
+        if len(evicted) == 0:
+            return
+        for d in evicted:
+            del self._released_databindings[d]
+            self._databinding_valuetype.pop(d, None)
+            self._unresolvable_databindings.discard(d)
+            self._watermarks.pop(d, None)
+            self._history.pop(d, None)
+        self._unpublish(evicted)
+        carb.log_info(f'evicted state of {len(evicted)} data bindings without subscriber')
 
-        carb.log_info('start data fetching job')
-        carb.log_info(f'total subs {len(self._subscribed_databindings)}')
-        blocking_tasks = []
+    # Called on the main thread once per app update
+    def _dispatch_changes(self):
+        if len(self._pending_changes) == 0:
+            return
+        dispatch_start = time.perf_counter()
+        changes, self._pending_changes = self._pending_changes, set()
+        datapoints = self._snapshot.datapoints
+        for d in changes:
+            callbacks = self._change_callbacks.get(d)
+            if not callbacks:
+                continue
+            datapoint = datapoints.get(d)
+            for callback in list(callbacks):
+                try:
+                    callback(d, datapoint)
+                except Exception as e:
+                    carb.log_error(f'change callback of {d} failed, error: {e}')
+        for listener in list(self._change_listeners):
+            try:
+                listener(changes)
+            except Exception as e:
+                carb.log_error(f'change listener failed, error: {e}')
+        get_metrics().observe('twinmaker_change_dispatch_seconds', 'Time spent notifying data binding changes',
+                              time.perf_counter() - dispatch_start, buckets=FRAME_BUCKETS)
+
+    # Gauges of the metrics endpoint, read on scrape on the main thread
+    def _collect_metrics(self):
+        now = time.time()
+        staleness = []
+        datapoints = self._snapshot.datapoints
         for d in self._subscribed_databindings:
-            blocking_tasks.append(loop.run_in_executor(self._executor, self._get_latest_property_value, 
-                                                       d, self._databinding_valuetype[d], 
-                                                       date_to_iso(self._last_fetch_endtime), date_to_iso(fetch_end_time)))
-        
-        if len(blocking_tasks) > 0:
-            await asyncio.wait(blocking_tasks)
+            datapoint = datapoints.get(d)
+            if datapoint is not None:
+                labels = (('entity', d.entity_id), ('component', d.component_name), ('property', d.property_name))
+                staleness.append((labels, max(now - datapoint.timestamp, 0)))
+        return [
+            ('twinmaker_subscribed_databindings', 'Subscribed data bindings', [((), len(self._subscribed_databindings))]),
+            ('twinmaker_subscriptions', 'Subscription handles',
+             [((), sum(len(handles) for handles in self._subscribers.values()))]),
+            ('twinmaker_executor_pending_tasks', 'Tasks submitted to the fetch executor and not completed',
+             [((), self._pending_tasks)]),
+            ('twinmaker_databinding_staleness_seconds', 'Age of the latest sample of each subscribed data binding',
+             staleness)
+        ]
 
-        carb.log_info('fetching data job completed')
-        self._is_fetching = False
-        self._last_fetch_endtime = fetch_end_time
-    
-    def _get_property_value_type(self, databinding):
-        carb.log_info(f'fetching data type for property {databinding}')
-        property_value_type = self._twinmaker.get_property_value_type(databinding)
-        self._databinding_valuetype[databinding] = property_value_type
-        carb.log_info(f'got data type for property {databinding}: {property_value_type}')
-
-    def _get_latest_property_value(self, databinding, datatype, starttime, endtime):
-        carb.log_info(f'fetching latest value for property {databinding}')
-        result = self._twinmaker.get_latest_property_value(databinding, datatype, starttime, endtime)
-        carb.log_info(f'got latest value for property {databinding}: {result}')
-        self._in_mem_store[databinding] = result
+    def add_change_callback(self, databinding, callback):
+        self._change_callbacks.setdefault(databinding, []).append(callback)
+        # Notify the current data point on the next dispatch
+        if databinding in self._snapshot.datapoints:
+            self._pending_changes.add(databinding)
+
+    def remove_change_callback(self, databinding, callback):
+        callbacks = self._change_callbacks.get(databinding)
+        if callbacks and callback in callbacks:
+            callbacks.remove(callback)
+            if len(callbacks) == 0:
+                del self._change_callbacks[databinding]
+
+    def add_change_listener(self, listener):
+        self._change_listeners.append(listener)
+
+    def remove_change_listener(self, listener):
+        if listener in self._change_listeners:
+            self._change_listeners.remove(listener)
+
+    def get_changed_since(self, version):
+        snapshot = self._snapshot
+        return [d for d, v in snapshot.versions.items() if v > version], snapshot.version
+
+    def _append_history(self, databinding, datapoints):
+        buffer = self._history.get(databinding)
+        if buffer is None:
+            settings = carb.settings.get_settings()
+            buffer = TimeSeriesBuffer(settings.get(HISTORY_CAPACITY_SETTING) or DEFAULT_HISTORY_CAPACITY,
+                                      settings.get(HISTORY_HORIZON_SETTING) or DEFAULT_HISTORY_HORIZON,
+                                      self._databinding_valuetype[databinding] == 'stringValue')
+            self._history[databinding] = buffer
+        buffer.extend([(p.timestamp, p.value) for p in datapoints])
+
+    @staticmethod
+    def _group_databindings(databindings):
+        groups = dict()
+        for d in databindings:
+            groups.setdefault((d.entity_id, d.component_name), []).append(d)
+        return list(groups.values())
+
+    def add_subscription(self, handle):
+        databinding = handle.databinding
+        handles = self._subscribers.setdefault(databinding, [])
+        handles.append(handle)
+        self._released_databindings.pop(databinding, None)
+        if len(handles) == 1:
+            self._subscribed_databindings = self._subscribed_databindings | {databinding}
+        self._scheduler.add(databinding, handle.poll_interval)
+        self._next_fetch_time = 0
+
+    def remove_subscription(self, handle):
+        if not handle.active:
+            return
+        handle.active = False
+        databinding = handle.databinding
+        handles = self._subscribers.get(databinding, [])
+        if handle in handles:
+            handles.remove(handle)
+        if len(handles) > 0:
+            # Poll at the shortest interval of the remaining subscribers
+            if handle.poll_interval is not None and all(h.poll_interval != handle.poll_interval for h in handles):
+                self._scheduler.set_intervals(databinding, [h.poll_interval for h in handles])
+            return
+        self._subscribers.pop(databinding, None)
+        self._subscribed_databindings = self._subscribed_databindings - {databinding}
+        self._scheduler.remove(databinding)
+        self._released_databindings[databinding] = time.monotonic()
 
     def start(self):
         if not self._subscription_handle:
             self._subscription_handle = omni.kit.app.get_app() \
                 .get_update_event_stream().create_subscription_to_pop(self._on_update, name="UPDATE_SUB")
+        get_metrics().set_collector('store', self._collect_metrics)
 
     def stop(self):
         self._subscription_handle = None
+        get_metrics().remove_collector('store', self._collect_metrics)
         self._is_fetching = False
+        if self._persistent_cache is not None:
+            self._persistent_cache.flush()
+        if self._recorder is not None:
+            self._recorder.flush()
+
+    # Stop for good, releasing the persistent cache and closing the recording
+    def destroy(self):
+        self.stop()
+        self.stop_recording()
+        if self._persistent_cache is not None:
+            self._persistent_cache.close()
+            self._persistent_cache = None
+
+    # Fetch all samples of a data binding between start_time and end_time (seconds since epoch), in time order.
+    # Blocking, called from a thread.
+    def fetch_range(self, databinding, start_time, end_time):
+        value_type = self._databinding_valuetype.get(databinding)
+        if value_type is None:
+            self._metadata.load_entity(databinding.entity_id)
+            value_type = self._metadata.get_property_value_type(databinding)
+            if value_type is None:
+                raise Exception(f'failed to resolve data type for property {databinding}')
+        history = self._requests.call(databinding.entity_id, self._data_source.get_property_values,
+                                      [databinding], {databinding: value_type},
+                                      epoch_to_iso(start_time), epoch_to_iso(end_time))
+        datapoints = history.get(databinding, [])[::-1]
+        timestamps = np.array([p.timestamp for p in datapoints], dtype=np.float64)
+        values = [p.value for p in datapoints]
+        if value_type != 'stringValue':
+            values = np.array(values, dtype=np.float64)
+        return timestamps, values
+
+    def start_history_playback(self, start_time, end_time):
+        self._history_playback = HistoryPlayback(self, start_time, end_time)
+        # Values of the live data would be mixed with the history
+        self._watermarks.clear()
+        carb.log_info(f'started history playback from {epoch_to_iso(start_time)} to {epoch_to_iso(end_time)}')
+
+    def stop_history_playback(self):
+        if self._history_playback is None:
+            return
+        self._history_playback = None
+        self._next_fetch_time = 0
+        carb.log_info('stopped history playback, back to live data')
+
+    def start_recording(self, path):
+        self.stop_recording()
+        self._recorder = Recorder(path)
+
+    def stop_recording(self):
+        recorder, self._recorder = self._recorder, None
+        if recorder is not None:
+            recorder.close()
 
 
 class DataBindingStore:
@@ -122,38 +550,135 @@ class DataBindingStore:
 
     def __init__(self):
         global_config = get_global_config()
-        self._worker = DataFetchingWorker(2, 
-                                          global_config['region'],
-                                          global_config['role'], 
-                                          global_config['workspace_id'])
+        metadata = EntityMetadataCache.get_instance()
+        # Values of the simulator or of a replay must not be warm started as values of the workspace
+        persistent_cache = None
+        if get_data_source_name() == TWINMAKER_DATA_SOURCE:
+            persistent_cache = open_persistent_cache(global_config['workspace_id'])
+        self._worker = DataFetchingWorker(None,
+                                          metadata.data_source,
+                                          metadata,
+                                          persistent_cache=persistent_cache,
+                                          request_scheduler=get_request_scheduler(global_config['workspace_id'],
+                                                                                  metadata.data_source))
+
+        recording_path = carb.settings.get_settings().get(RECORDING_PATH_SETTING)
+        if recording_path:
+            self.start_recording(recording_path)
         
     
     # force create a new 'singleton' to workaround the sync issue between Scripting and extension
     @classmethod
     def force_reinit(cls) -> DataBindingStore:
-        cls.__instance = None
+        cls.destroy_instance()
         return cls.get_instance()
 
+    @classmethod
+    def destroy_instance(cls):
+        """Stop the current store and release its files, the next get_instance creates a new store"""
+        if cls.__instance is not None:
+            cls.__instance._worker.destroy()
+            cls.__instance = None
+
     def start_data_fetching(self):
         self._worker.start()
 
     def stop_data_fetching(self):
         self._worker.stop()
 
-    def subscribe(self, databinding: DataBinding):
+    def start_history_playback(self, start_time, end_time):
+        """
+        Serve the values of subscribed data bindings at the time of the timeline playhead, the timeline range being
+        mapped onto [start_time, end_time] in seconds since epoch
+        """
+        self._worker.start_history_playback(start_time, end_time)
+
+    def stop_history_playback(self):
+        """Go back to fetching the latest values"""
+        self._worker.stop_history_playback()
+
+    def start_recording(self, path):
+        """Append every fetched data point to the recording at path, see recording.py"""
+        self._worker.start_recording(path)
+
+    def stop_recording(self):
+        self._worker.stop_recording()
+
+    def subscribe(self, databinding: DataBinding, poll_interval=None) -> SubscriptionHandle:
+        """
+        Fetch the data binding until the returned handle is unsubscribed. The data binding is fetched while
+        it has at least one subscriber, at the shortest poll interval of its subscribers.
+        """
         carb.log_info(f'adding {databinding} to subscription')
-        self._worker._subscribed_databindings.add(databinding)
+        handle = SubscriptionHandle(databinding, poll_interval)
+        self._worker.add_subscription(handle)
         carb.log_info(f'total subs {len(self._worker._subscribed_databindings)}')
+        return handle
 
-    def unsubscribe(self, databinding: DataBinding):
-        carb.log_info(f'removing {databinding} from subscription')
-        if databinding in self._worker._subscribed_databindings:
-            self._worker._subscribed_databindings.remove(databinding)
+    def unsubscribe(self, handle: SubscriptionHandle):
+        """
+        Release a subscription, unsubscribing a handle twice has no effect. The state of a data binding
+        without subscriber is evicted after the subscriptions.stateTtl setting.
+        """
+        carb.log_info(f'removing {handle.databinding} from subscription')
+        self._worker.remove_subscription(handle)
         carb.log_info(f'total subs {len(self._worker._subscribed_databindings)}')
-        # TODO: clear in mem states
-        
+
+
     def get_latest_datapoint(self, databinding: DataBinding):
-        if databinding in self._worker._in_mem_store:
-            return self._worker._in_mem_store[databinding]
-        else:
-            return None
\ No newline at end of file
+        return self._worker._snapshot.datapoints.get(databinding)
+
+    def get_snapshot(self) -> StoreSnapshot:
+        """
+        Return the current snapshot of the stored data points. Read several data points from the same snapshot
+        to get values of the same fetch cycle.
+        """
+        return self._worker._snapshot
+
+    def get_version(self):
+        """Return the current version, incremented on every published change of the stored data points"""
+        return self._worker._snapshot.version
+
+    def get_changed_since(self, version):
+        """Return the data bindings changed after the given version, and the current version"""
+        return self._worker.get_changed_since(version)
+
+    def add_change_callback(self, databinding: DataBinding, callback):
+        """
+        Call callback(databinding, datapoint) on the main thread, at most once per app update, when the data point
+        of the data binding changes. The current data point, if any, is notified on the next update.
+        """
+        self._worker.add_change_callback(databinding, callback)
+
+    def remove_change_callback(self, databinding: DataBinding, callback):
+        self._worker.remove_change_callback(databinding, callback)
+
+    def add_change_listener(self, listener):
+        """
+        Call listener(databindings) on the main thread, at most once per app update, with the set of data bindings
+        whose data point changed since the previous call. For consumers of many data bindings, one call per update
+        instead of one callback per data binding.
+        """
+        self._worker.add_change_listener(listener)
+
+    def remove_change_listener(self, listener):
+        self._worker.remove_change_listener(listener)
+
+    def get_latest_sample(self, databinding: DataBinding):
+        """Return the latest (timestamp, value) sample of a data binding, timestamp in seconds since epoch"""
+        buffer = self._worker._history.get(databinding)
+        return buffer.latest() if buffer is not None else None
+
+    def get_range(self, databinding: DataBinding, t0=None, t1=None):
+        """Return the (timestamps, values) arrays of the samples of a data binding with t0 <= timestamp <= t1"""
+        buffer = self._worker._history.get(databinding)
+        if buffer is None:
+            return None
+        return buffer.get_range(t0, t1)
+
+    def fetch_range(self, databinding: DataBinding, t0, t1):
+        """
+        Fetch the (timestamps, values) of the samples of a data binding with t0 <= timestamp <= t1 from the data source,
+        for ranges older than the kept history. Blocking, run it in an executor.
+        """
+        return self._worker.fetch_range(databinding, t0, t1)
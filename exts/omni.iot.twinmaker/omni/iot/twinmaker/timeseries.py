@@ -0,0 +1,137 @@
+from threading import Lock
+import numpy as np
+
+DEFAULT_HISTORY_CAPACITY = 1024
+DEFAULT_HISTORY_HORIZON = 3600
+
+
+class TimeSeriesBuffer:
+    """
+    Fixed capacity ring buffer of (timestamp, value) samples of one data binding, ordered by time.
+    Timestamps are seconds since epoch stored in a float64 array. Numeric values are stored in a float64 array,
+    string values are interned and stored as int32 codes. Samples older than the horizon (in seconds) relative
+    to the latest sample are dropped.
+    """
+    def __init__(self, capacity=DEFAULT_HISTORY_CAPACITY, horizon=DEFAULT_HISTORY_HORIZON, is_string=False):
+        self._capacity = capacity
+        self._horizon = horizon
+        self._is_string = is_string
+        self._lock = Lock()
+
+        self._timestamps = np.zeros(capacity, dtype=np.float64)
+        self._values = np.zeros(capacity, dtype=np.int32 if is_string else np.float64)
+        # Index of the oldest sample and number of samples
+        self._start = 0
+        self._size = 0
+
+        self._string_codes = dict()
+        self._strings = []
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def is_string(self):
+        return self._is_string
+
+    def _encode(self, value):
+        if not self._is_string:
+            return value
+        code = self._string_codes.get(value)
+        if code is None:
+            if len(self._strings) >= 2 * self._capacity:
+                self._compact_strings()
+            code = len(self._strings)
+            self._string_codes[value] = code
+            self._strings.append(value)
+        return code
+
+    # Rebuild the intern table from the strings of the samples still in the buffer, dropping the strings of evicted
+    # samples. The buffer holds at most capacity distinct strings, so the table stays under 2 * capacity strings.
+    def _compact_strings(self):
+        strings = []
+        string_codes = dict()
+        for j in range(self._size):
+            i = self._index(j)
+            value = self._strings[self._values[i]]
+            code = string_codes.get(value)
+            if code is None:
+                code = len(strings)
+                string_codes[value] = code
+                strings.append(value)
+            self._values[i] = code
+        self._strings = strings
+        self._string_codes = string_codes
+
+    def _decode(self, values):
+        if not self._is_string:
+            return values
+        return [self._strings[code] for code in values]
+
+    def _index(self, i):
+        return (self._start + i) % self._capacity
+
+    def _drop_before(self, min_timestamp):
+        while self._size > 0 and self._timestamps[self._start] < min_timestamp:
+            self._start = (self._start + 1) % self._capacity
+            self._size -= 1
+
+    def append(self, timestamp, value):
+        """Append a sample, samples that are not newer than the latest one are ignored"""
+        if value is None:
+            return False
+        with self._lock:
+            if self._size > 0 and timestamp <= self._timestamps[self._index(self._size - 1)]:
+                return False
+            if self._horizon:
+                self._drop_before(timestamp - self._horizon)
+
+            if self._size == self._capacity:
+                # Overwrite the oldest sample
+                self._start = (self._start + 1) % self._capacity
+                self._size -= 1
+            i = self._index(self._size)
+            self._timestamps[i] = timestamp
+            self._values[i] = self._encode(value)
+            self._size += 1
+            return True
+
+    def extend(self, samples):
+        """Append (timestamp, value) samples in any order, return the number of samples added"""
+        added = 0
+        for timestamp, value in sorted(samples, key=lambda s: s[0]):
+            if self.append(timestamp, value):
+                added += 1
+        return added
+
+    def latest(self):
+        """Return the latest (timestamp, value) sample, or None if the buffer is empty"""
+        with self._lock:
+            if self._size == 0:
+                return None
+            i = self._index(self._size - 1)
+            value = self._values[i].item()
+            return self._timestamps[i].item(), self._strings[value] if self._is_string else value
+
+    def _ordered(self):
+        end = self._start + self._size
+        if end <= self._capacity:
+            return self._timestamps[self._start:end], self._values[self._start:end]
+        wrapped = end - self._capacity
+        return np.concatenate((self._timestamps[self._start:], self._timestamps[:wrapped])), \
+            np.concatenate((self._values[self._start:], self._values[:wrapped]))
+
+    def get_range(self, t0=None, t1=None):
+        """
+        Return the samples with t0 <= timestamp <= t1 as a (timestamps, values) pair.
+        Timestamps are a float64 array, values are a float64 array or a list of strings.
+        """
+        with self._lock:
+            timestamps, values = self._ordered()
+            lo = 0 if t0 is None else np.searchsorted(timestamps, t0, side='left')
+            hi = len(timestamps) if t1 is None else np.searchsorted(timestamps, t1, side='right')
+            return timestamps[lo:hi].copy(), self._decode(values[lo:hi].copy())
@@ -1,42 +1,90 @@
 from omni.iot.twinmaker.utils.aws_utils import get_aws_client
-from omni.iot.twinmaker.utils.twinmaker_utils import convert_data_type
+from omni.iot.twinmaker.utils.twinmaker_utils import get_sample_time, iso_to_epoch
 from omni.iot.twinmaker.data_models import DataPoint
+from omni.iot.twinmaker.data_source import DataSource
 
-class TwinMaker:
+class TwinMaker(DataSource):
+    remote = True
 
     def __init__(self, region, assume_role_arn, workspace_id):
         self._tm_client = get_aws_client('iottwinmaker', region, assume_role_arn)
         self._workspace_id = workspace_id
 
-    def get_property_value_type(self, data_binding):
+    # Return the data type of every property of an entity: {componentName: {propertyName: type}}
+    def get_entity_property_types(self, entity_id):
         entity_result = self._tm_client.get_entity(
             workspaceId=self._workspace_id,
-            entityId=data_binding.entity_id
-        )
-        
-        property_type = entity_result['components'][data_binding.component_name]['properties'][data_binding.property_name]\
-            ['definition']['dataType']['type']
-        
-        return convert_data_type(property_type)
-
-    def get_latest_property_value(self, data_binding, data_type, start_time, end_time):
-        result = self._tm_client.get_property_value_history(
-            workspaceId=self._workspace_id,
-            entityId=data_binding.entity_id,
-            componentName=data_binding.component_name,
-            selectedProperties=[data_binding.property_name],
-            orderByTime='DESCENDING',
-            startTime=start_time,
-            endTime=end_time
+            entityId=entity_id
         )
 
-        values = result['propertyValues']
-        
-        value = None
-        if len(values) > 0 and len(values[0]['values']) > 0:
-            value = values[0]['values'][0]['value'][data_type]
-            if  data_type != 'stringValue':
-                value = float(value)
-        
-        # TODO: should use the actual data point timestamp
-        return DataPoint(end_time, value)
+        components = {}
+        for component_name, component in entity_result.get('components', {}).items():
+            components[component_name] = {
+                property_name: prop['definition']['dataType']['type']
+                for property_name, prop in component.get('properties', {}).items()
+            }
+        return components
+
+    # Fetch the latest value of several properties of the same entity component, one call per property
+    # All data bindings must share the same entityId and componentName
+    # Data bindings without a value between start_time and end_time map to None
+    def get_latest_property_values(self, data_bindings, data_types, start_time, end_time):
+        latest = {}
+        for d in data_bindings:
+            result = self._tm_client.get_property_value_history(
+                workspaceId=self._workspace_id,
+                entityId=d.entity_id,
+                componentName=d.component_name,
+                selectedProperties=[d.property_name],
+                orderByTime='DESCENDING',
+                startTime=start_time,
+                endTime=end_time,
+                maxResults=1
+            )
+            latest[d] = None
+            for property_values in result['propertyValues']:
+                for sample in property_values['values'][:1]:
+                    value = sample['value'][data_types[d]]
+                    if data_types[d] != 'stringValue':
+                        value = float(value)
+                    latest[d] = DataPoint(iso_to_epoch(get_sample_time(sample)), value)
+        return latest
+
+    # Fetch all values of several properties of the same entity component between start_time and end_time
+    # Return the data points of each data binding, latest first, timestamped with their sample time in seconds since epoch
+    def get_property_values(self, data_bindings, data_types, start_time, end_time):
+        entity_id = data_bindings[0].entity_id
+        component_name = data_bindings[0].component_name
+        bindings_by_property = {d.property_name: d for d in data_bindings}
+
+        history = {d: [] for d in data_bindings}
+        request = {
+            'workspaceId': self._workspace_id,
+            'entityId': entity_id,
+            'componentName': component_name,
+            'selectedProperties': list(bindings_by_property.keys()),
+            'orderByTime': 'DESCENDING',
+            'startTime': start_time,
+            'endTime': end_time,
+            'maxResults': 250
+        }
+        while True:
+            result = self._tm_client.get_property_value_history(**request)
+            for property_values in result['propertyValues']:
+                property_name = property_values['entityPropertyReference']['propertyName']
+                if property_name not in bindings_by_property:
+                    continue
+                d = bindings_by_property[property_name]
+                data_type = data_types[d]
+                for sample in property_values['values']:
+                    value = sample['value'][data_type]
+                    if data_type != 'stringValue':
+                        value = float(value)
+                    history[d].append(DataPoint(iso_to_epoch(get_sample_time(sample)), value))
+
+            next_token = result.get('nextToken')
+            if not next_token:
+                break
+            request['nextToken'] = next_token
+
+        return history
@@ -1,21 +1,75 @@
+from threading import Lock
 import boto3
+import botocore.session
 import uuid
+from botocore.config import Config
+from botocore.credentials import CredentialProvider, CredentialResolver, DeferredRefreshableCredentials
 
-from omni.iot.twinmaker.constants import DEFAULT_ASSUME_ROLE_ARN
+from omni.iot.twinmaker.constants import DEFAULT_ASSUME_ROLE_ARN, FETCH_EXECUTOR_WORKERS
 
+ASSUME_ROLE_DURATION = 1800
+# Fetch executor threads plus the same number of concurrent metadata and import requests
+MAX_POOL_CONNECTIONS = 2 * FETCH_EXECUTOR_WORKERS
+
+_sessions = {}
+_clients = {}
+_lock = Lock()
+
+# Credentials of an assumed role, assumed on first use and renewed by botocore before they expire
+class _AssumeRoleCredentialProvider(CredentialProvider):
+    METHOD = 'sts-assume-role'
+
+    def __init__(self, assumeRoleARN):
+        super().__init__()
+        self._assumeRoleARN = assumeRoleARN
+
+    def _refresh(self):
+        response = boto3.client('sts').assume_role(
+            RoleArn=self._assumeRoleARN,
+            RoleSessionName=f'nvidia-ov-session{uuid.uuid1()}',
+            DurationSeconds=ASSUME_ROLE_DURATION
+        )
+        credentials = response['Credentials']
+        return {
+            'access_key': credentials['AccessKeyId'],
+            'secret_key': credentials['SecretAccessKey'],
+            'token': credentials['SessionToken'],
+            'expiry_time': credentials['Expiration'].isoformat()
+        }
+
+    def load(self):
+        return DeferredRefreshableCredentials(refresh_using=self._refresh, method=self.METHOD)
+
+def _get_session(region, assumeRoleARN):
+    key = (region, assumeRoleARN)
+    session = _sessions.get(key)
+    if session is None:
+        if assumeRoleARN is None:
+            session = boto3.Session(region_name=region)
+        else:
+            botocore_session = botocore.session.get_session()
+            botocore_session.register_component('credential_provider',
+                                                CredentialResolver([_AssumeRoleCredentialProvider(assumeRoleARN)]))
+            session = boto3.Session(botocore_session=botocore_session, region_name=region)
+        _sessions[key] = session
+    return session
+
+# Return the client shared by the whole process for a service, region and role
 def get_aws_client(serviceName, region, assumeRoleARN):
     if not assumeRoleARN or assumeRoleARN == DEFAULT_ASSUME_ROLE_ARN:
-        return boto3.client(serviceName, region)
-
-    stsClient = boto3.client('sts')
-    response = stsClient.assume_role(
-        RoleArn=assumeRoleARN,
-        RoleSessionName=f'nvidia-ov-session{uuid.uuid1()}',
-        DurationSeconds=1800
-    )
-    newSession = boto3.Session(
-        aws_access_key_id=response['Credentials']['AccessKeyId'],
-        aws_secret_access_key=response['Credentials']['SecretAccessKey'],
-        aws_session_token=response['Credentials']['SessionToken']
-    )
-    return newSession.client(serviceName, region)
\ No newline at end of file
+        assumeRoleARN = None
+
+    key = (serviceName, region, assumeRoleARN)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            session = _get_session(region, assumeRoleARN)
+            client = session.client(serviceName, region, config=Config(max_pool_connections=MAX_POOL_CONNECTIONS))
+            _clients[key] = client
+        return client
+
+# Drop the shared clients and sessions, so the next clients get new credentials
+def clear_aws_clients():
+    with _lock:
+        _clients.clear()
+        _sessions.clear()
@@ -3,8 +3,8 @@ import omni.usd
 from pxr import Gf, Sdf
 import carb
 
-from omni.iot.twinmaker.constants import ENTITY_ATTR, COMPONENT_ATTR, PROPERTY_ATTR, \
-    RULE_OP_ATTR, RULE_VAL_ATTR, WORKSPACE_ATTR, ASSUME_ROLE_ATTR, REGION_ATTR, BOUND_MIN, BOUND_MAX
+from omni.iot.twinmaker.constants import ENTITY_ATTR, COMPONENT_ATTR, PROPERTY_ATTR, POLL_INTERVAL_ATTR, \
+    INTERPOLATION_ATTR, RULE_OP_ATTR, RULE_VAL_ATTR, WORKSPACE_ATTR, ASSUME_ROLE_ATTR, REGION_ATTR, BOUND_MIN, BOUND_MAX
 from omni.iot.twinmaker.data_models import DataBinding, RuleExpression, DataBounds
 
 GLOBAL_LOGIC_PRIM_PATH = '/World/Logic'
@@ -70,6 +70,16 @@ def get_data_binding_from_prim(prim):
     data_binding = DataBinding(entity_id, component_name, property_name)
     return data_binding
 
+# Return the poll interval declared on the prim, or None to use the default interval
+def get_poll_interval_from_prim(prim):
+    attr = prim.GetAttribute(POLL_INTERVAL_ATTR)
+    return attr.Get() if attr else None
+
+# Return the interpolation mode declared on the prim, or None to use the default mode
+def get_interpolation_from_prim(prim):
+    attr = prim.GetAttribute(INTERPOLATION_ATTR)
+    return attr.Get() if attr else None
+
 def get_rule_exp_list_from_prim(prim):
     property_name = prim.GetAttribute(PROPERTY_ATTR).Get()
     rule_op_list = prim.GetAttribute(RULE_OP_ATTR).Get()
@@ -0,0 +1,76 @@
+import functools
+import carb.profiler
+import carb.settings
+
+from omni.iot.twinmaker.constants import PROFILING_ENABLED_SETTING
+
+PROFILER_MASK = 1
+
+_enabled = None
+_settings_subscription = None
+
+
+def _on_setting_changed(*args):
+    global _enabled
+    _enabled = bool(carb.settings.get_settings().get(PROFILING_ENABLED_SETTING))
+
+
+# Read once, then kept up to date by a settings subscription so zones cost a global lookup when disabled
+def is_profiling_enabled():
+    global _settings_subscription
+    if _enabled is None:
+        _on_setting_changed()
+        settings = carb.settings.get_settings()
+        _settings_subscription = settings.subscribe_to_node_change_events(PROFILING_ENABLED_SETTING,
+                                                                          _on_setting_changed)
+    return _enabled
+
+
+class _Zone:
+    __slots__ = ('_name',)
+
+    def __init__(self, name):
+        self._name = name
+
+    def __enter__(self):
+        carb.profiler.begin(PROFILER_MASK, self._name)
+
+    def __exit__(self, *args):
+        carb.profiler.end(PROFILER_MASK)
+
+
+class _NoZone:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *args):
+        pass
+
+
+_NO_ZONE = _NoZone()
+
+
+def profile_zone(name):
+    """
+    Return a context manager timing its block as a named carb.profiler zone, shown in Tracy and the Kit profiler.
+    Zones are only emitted when the profiling.enabled setting is on.
+    """
+    return _Zone(name) if is_profiling_enabled() else _NO_ZONE
+
+
+def profiled(name):
+    """Decorator timing each call of a function as a named profiler zone, see profile_zone"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not is_profiling_enabled():
+                return fn(*args, **kwargs)
+            carb.profiler.begin(PROFILER_MASK, name)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                carb.profiler.end(PROFILER_MASK)
+        return wrapper
+    return decorator
@@ -5,8 +5,9 @@ from pxr import Sdf
 import omni.kit.commands
 
 from omni.iot.twinmaker.utils.omni_utils import get_prim, create_and_set_prim_attr, create_and_set_prim_array_attr
-from omni.iot.twinmaker.constants import ENTITY_ATTR, COMPONENT_ATTR, PROPERTY_ATTR, RULE_OP_ATTR, \
-    RULE_VAL_ATTR, MAT_COLOR_ATTR, CHANGE_MAT_PATH, RULES_KEY, BOUNDS_KEY, BOUND_MIN, BOUND_MAX, WIDGET_KEY
+from omni.iot.twinmaker.constants import ENTITY_ATTR, COMPONENT_ATTR, PROPERTY_ATTR, POLL_INTERVAL_ATTR, RULE_OP_ATTR, \
+    RULE_VAL_ATTR, MAT_COLOR_ATTR, CHANGE_MAT_PATH, RULES_KEY, BOUNDS_KEY, BOUND_MIN, BOUND_MAX, WIDGET_KEY, \
+    INTERPOLATION_ATTR
 
 # Source: https://github.com/mati-nvidia/developer-office-hours/blob/main/exts/maticodes.doh_2023_01_13/scripts/add_script_component.py
 def attach_python_script(primPath, scriptPath):
@@ -57,6 +58,8 @@ def get_json_field(data, field_name):
 #   "componentName": <REQUIRED>
 #   "propertyName": <REQUIRED>
 #   "widget": <REQUIRED> (ModelShader | ModelScaler | MotionIndicator)
+#   "pollInterval": <OPTIONAL> seconds between fetches
+#   "interpolation": <OPTIONAL> (hold | linear | damped) for ModelScaler and MotionIndicator
 #   "rule": [{ // optional list of rules
 #       "ruleOperator": <REQUIRED>, // within a rule, these fields are required
 #       "ruleValue": <REQUIRED>,
@@ -77,14 +80,17 @@ def attach_data_binding(data_binding_config):
         create_and_set_prim_attr(prim, ENTITY_ATTR, data_binding[ENTITY_ATTR])
         create_and_set_prim_attr(prim, COMPONENT_ATTR, data_binding[COMPONENT_ATTR])
         create_and_set_prim_attr(prim, PROPERTY_ATTR, data_binding[PROPERTY_ATTR])
+        poll_interval = get_json_field(data_binding, POLL_INTERVAL_ATTR)
+        if poll_interval is not None:
+            create_and_set_prim_attr(prim, POLL_INTERVAL_ATTR, float(poll_interval))
 
         widget = data_binding[WIDGET_KEY]
 
+        # The widget system updates the prims by their widget attribute, without a script per prim
         if widget == 'ModelShader':
             # Set rule attributes in an array in order
             rules_list = data_binding[RULES_KEY]
             if len(rules_list) > 0:
-                model_shader_script_path = os.path.abspath(f'{os.path.abspath(__file__)}\\..\\..\\scripting\\ModelShader.py')
                 # Reset list attributes
                 reset_attr(prim, RULE_OP_ATTR, [])
                 reset_attr(prim, RULE_VAL_ATTR, [])
@@ -96,19 +102,17 @@ def attach_data_binding(data_binding_config):
                     create_and_set_prim_array_attr(prim, RULE_VAL_ATTR, rule[RULE_VAL_ATTR])
                     create_and_set_prim_array_attr(prim, MAT_COLOR_ATTR, get_json_field(rule, MAT_COLOR_ATTR))
                     create_and_set_prim_array_attr(prim, CHANGE_MAT_PATH, get_json_field(rule, CHANGE_MAT_PATH))
-                # Attach ModelShader script
-                attach_python_script(prim_path, model_shader_script_path)
+                create_and_set_prim_attr(prim, WIDGET_KEY, widget)
 
         elif widget == 'ModelScaler' or widget == 'MotionIndicator':
-            model_scaler_script_path = os.path.abspath(f'{os.path.abspath(__file__)}\\..\\..\\scripting\\ModelScaler.py')
-            motion_indicator_script_path = os.path.abspath(f'{os.path.abspath(__file__)}\\..\\..\\scripting\\MotionIndicator.py')
             # Set bounds attributes
             bounds = data_binding[BOUNDS_KEY]
             create_and_set_prim_attr(prim, BOUND_MIN, bounds[BOUND_MIN])
             create_and_set_prim_attr(prim, BOUND_MAX, bounds[BOUND_MAX])
-            # Attach script
-            script = model_scaler_script_path if widget == 'ModelScaler' else motion_indicator_script_path
-            attach_python_script(prim_path, script)
+            interpolation = get_json_field(data_binding, INTERPOLATION_ATTR)
+            if interpolation is not None:
+                create_and_set_prim_attr(prim, INTERPOLATION_ATTR, interpolation)
+            create_and_set_prim_attr(prim, WIDGET_KEY, widget)
 
 
 def attach_global_config(prim_path):
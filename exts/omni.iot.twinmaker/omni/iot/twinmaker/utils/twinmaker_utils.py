@@ -1,6 +1,16 @@
+from datetime import datetime, timezone
+import operator
+import re
+
+from omni.iot.twinmaker.utils.profiler_utils import profiled
+
 def date_to_iso(time):
     return f'{time.isoformat()}Z'
 
+# Convert seconds since epoch to a UTC ISO 8601 timestamp
+def epoch_to_iso(time):
+    return date_to_iso(datetime.fromtimestamp(time, timezone.utc).replace(tzinfo=None))
+
 def convert_data_type(property_type):
     if property_type == 'STRING':
         return 'stringValue'
@@ -15,20 +25,21 @@ def convert_data_type(property_type):
     else:
         raise Exception('Unsupported data type')
 
+RULE_OPERATORS = {
+    '==': operator.eq,
+    '>': operator.gt,
+    '<': operator.lt,
+    '>=': operator.ge,
+    '<=': operator.le
+}
+
 def apply_operator(left, op, right):
-    if op == '==':
-        return left == right
-    elif op == '>':
-        return left > right
-    elif op == '<':
-        return left < right
-    elif op == '>=':
-        return left >= right
-    elif op == '<=':
-        return left <= right
-    else:
+    compare = RULE_OPERATORS.get(op)
+    if compare is None:
         raise Exception('Unsupported rule operator')
+    return compare(left, right)
 
+@profiled('TwinMaker::evaluate_rule')
 def evaluate_rule(rule_expression_list, property_value):
     if property_value is not None:
         i = 0
@@ -39,3 +50,24 @@ def evaluate_rule(rule_expression_list, property_value):
             i += 1
     
     return -1
+
+# Fractional seconds of an ISO 8601 timestamp
+_FRACTION = re.compile(r'\.(\d+)')
+
+# Convert a TwinMaker ISO 8601 timestamp to seconds since epoch, timestamps without offset are UTC.
+# TwinMaker returns up to 9 fractional digits, datetime.fromisoformat before Python 3.11 only parses 3 or 6.
+def iso_to_epoch(time):
+    if time.endswith('Z'):
+        time = time[:-1] + '+00:00'
+    time = _FRACTION.sub(lambda m: '.' + m.group(1)[:6].ljust(6, '0'), time, count=1)
+    date = datetime.fromisoformat(time)
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date.timestamp()
+
+# Return the ISO 8601 time of a TwinMaker property value sample
+def get_sample_time(sample):
+    if 'time' in sample:
+        return sample['time']
+    # Deprecated field, returned as a datetime by boto3
+    return date_to_iso(sample['timestamp'].astimezone(timezone.utc).replace(tzinfo=None))
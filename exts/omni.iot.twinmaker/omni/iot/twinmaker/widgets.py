@@ -0,0 +1,536 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import time
+import numpy as np
+import carb
+import carb.settings
+import omni.kit.app
+import omni.usd
+from pxr import Gf
+
+from omni.iot.twinmaker.store import DataBindingStore
+from omni.iot.twinmaker.runtime_layer import RuntimeLayer
+from omni.iot.twinmaker.material_pool import MaterialPool
+from omni.iot.twinmaker.rules import RuleEngine, NO_MATCH
+from omni.iot.twinmaker.interpolation import HOLD, LINEAR, DAMPED, DAMPED_SMOOTH_TIME_RATIO, parse_interpolation, \
+    lerp, smooth_damp
+from omni.iot.twinmaker.metrics import get_metrics, FRAME_BUCKETS
+from omni.iot.twinmaker.utils.omni_utils import get_prim, get_data_binding_from_prim, get_poll_interval_from_prim, \
+    get_rule_exp_list_from_prim, get_data_bounds_attributes_from_prim, get_interpolation_from_prim
+from omni.iot.twinmaker.utils.profiler_utils import profiled
+from omni.iot.twinmaker.constants import WIDGET_KEY, MAT_COLOR_ATTR, CHANGE_MAT_PATH, WIDGETS_INTERPOLATION_SETTING, \
+    WIDGETS_MAX_INTERPOLATION_DURATION_SETTING
+
+INITIAL_CAPACITY = 64
+DEFAULT_MAX_INTERPOLATION_DURATION = 60
+# Longest frame time a damped animation step is computed with, so a hitch does not make it jump
+MAX_ANIMATION_STEP = 0.1
+# Distance to the target, relative to the output range, below which a damped animation ends
+SETTLE_TOLERANCE = 1e-3
+
+
+def _grown(array, capacity):
+    grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, np.number))
+
+
+def get_widget_from_prim(prim):
+    """Return the widget type of a prim bound by attach_data_binding, or None"""
+    attr = prim.GetAttribute(WIDGET_KEY)
+    return attr.Get() if attr else None
+
+
+class _WidgetGroup(ABC):
+    """
+    Bound prims of one widget type. Each prim has a slot, the index of its row in the arrays of the group,
+    so the prims of a fetch cycle are evaluated in one pass over the rows of their slots. Values are written
+    to the runtime layer.
+    """
+    # Names of the per slot NumPy arrays, grown together
+    ARRAYS = ('_applied',)
+
+    def __init__(self, runtime_layer):
+        self._runtime_layer = runtime_layer
+        self._capacity = INITIAL_CAPACITY
+        self._size = 0
+        self._free_slots = []
+        # Prim path of each slot, None for free slots
+        self._paths = [None] * self._capacity
+        # Whether the prim of the slot was written since it was added
+        self._applied = np.zeros(self._capacity, dtype=bool)
+        self._init_arrays(self._capacity)
+
+    def _init_arrays(self, capacity):
+        pass
+
+    def _grow(self):
+        self._capacity *= 2
+        for name in self.ARRAYS:
+            setattr(self, name, _grown(getattr(self, name), self._capacity))
+        self._paths += [None] * (self._capacity - len(self._paths))
+
+    def add(self, prim):
+        """Add a bound prim, return its slot"""
+        if len(self._free_slots) > 0:
+            slot = self._free_slots.pop()
+        else:
+            if self._size == self._capacity:
+                self._grow()
+            slot = self._size
+            self._size += 1
+        try:
+            self._set(slot, prim)
+        except Exception:
+            self._free_slots.append(slot)
+            raise
+        self._paths[slot] = str(prim.GetPath())
+        self._applied[slot] = False
+        return slot
+
+    def remove(self, slot):
+        self._paths[slot] = None
+        self._free_slots.append(slot)
+
+    # Restore the authored values of prims written since they were added
+    def reset(self, slots):
+        for slot in slots:
+            if self._applied[slot] and self._paths[slot] is not None:
+                self._reset(slot)
+                self._applied[slot] = False
+
+    # Read the widget settings of a prim into its slot
+    @abstractmethod
+    def _set(self, slot, prim):
+        pass
+
+    @abstractmethod
+    def _reset(self, slot):
+        pass
+
+    @abstractmethod
+    def update(self, slots, values, timestamps, now):
+        """
+        Update the prims of slots, an int array, with the new property values of their data bindings and the times
+        of their samples in seconds since epoch. now is the time.monotonic() of the frame.
+        """
+        pass
+
+    def animate(self, now):
+        """Advance the prims animated between samples, called once per frame"""
+        pass
+
+
+class _BoundedWidgetGroup(_WidgetGroup):
+    """
+    Prims set to the property value normalized from their data bounds to [PRIM_MIN, PRIM_MAX]. In the linear and
+    damped interpolation modes the output moves to a new value over the time between its sample and the previous
+    sample, instead of jumping to it, so prims keep moving smoothly between fetches.
+    """
+    FLOAT_ARRAYS = ('_data_min', '_data_max', '_data_diff', '_prim_min', '_prim_diff',
+                    # Written output, and the animation from start at start_time to target over duration seconds
+                    '_output', '_start', '_target', '_start_time', '_duration', '_velocity',
+                    # Time in seconds since epoch of the last sample
+                    '_sample_time')
+    ARRAYS = _WidgetGroup.ARRAYS + FLOAT_ARRAYS + ('_modes', '_animating')
+    PRIM_MIN = 0
+    PRIM_MAX = 1
+
+    def _init_arrays(self, capacity):
+        for name in self.FLOAT_ARRAYS:
+            setattr(self, name, np.zeros(capacity, dtype=np.float64))
+        self._modes = np.zeros(capacity, dtype=np.int8)
+        self._animating = np.zeros(capacity, dtype=bool)
+        self._any_animating = False
+        self._last_animate_time = None
+        settings = carb.settings.get_settings()
+        self._default_mode = parse_interpolation(settings.get(WIDGETS_INTERPOLATION_SETTING))
+        self._max_duration = settings.get(WIDGETS_MAX_INTERPOLATION_DURATION_SETTING) or \
+            DEFAULT_MAX_INTERPOLATION_DURATION
+        # Path and value type of the attribute written by the widget
+        self._attribute_paths = [None] * capacity
+        self._type_names = [None] * capacity
+        self._defaults = [None] * capacity
+
+    def _grow(self):
+        super()._grow()
+        for name in ('_attribute_paths', '_type_names', '_defaults'):
+            values = getattr(self, name)
+            values += [None] * (self._capacity - len(values))
+
+    def _set(self, slot, prim):
+        bounds = get_data_bounds_attributes_from_prim(prim, self.PRIM_MIN, self.PRIM_MAX)
+        self._data_min[slot] = bounds.data_min
+        self._data_max[slot] = bounds.data_max
+        self._data_diff[slot] = bounds.data_max - bounds.data_min
+        self._prim_min[slot] = bounds.prim_min
+        self._prim_diff[slot] = bounds.prim_max - bounds.prim_min
+        self._modes[slot] = parse_interpolation(get_interpolation_from_prim(prim), self._default_mode)
+        self._sample_time[slot] = np.nan
+        self._velocity[slot] = 0
+        self._animating[slot] = False
+        attribute, self._defaults[slot] = self._get_attribute(prim)
+        if not attribute.IsValid():
+            raise Exception(f'attribute {attribute.GetPath()} not found')
+        self._attribute_paths[slot] = attribute.GetPath()
+        self._type_names[slot] = attribute.GetTypeName()
+
+    # Return the attribute written by the widget and its authored value
+    @abstractmethod
+    def _get_attribute(self, prim):
+        pass
+
+    # Write the output of a slot to the runtime layer
+    @abstractmethod
+    def _apply(self, slot, output):
+        pass
+
+    def _reset(self, slot):
+        self._runtime_layer.clear(self._attribute_paths[slot])
+
+    def remove(self, slot):
+        self._animating[slot] = False
+        super().remove(slot)
+
+    # Same arithmetic as DataBounds.normalize, on all the slots at once
+    def update(self, slots, values, timestamps, now):
+        try:
+            values = np.array(values, dtype=np.float64)
+        except (TypeError, ValueError):
+            values = np.array([float(v) if _is_number(v) else np.nan for v in values], dtype=np.float64)
+        data_min = self._data_min[slots]
+        in_bounds = (values >= data_min) & (values <= self._data_max[slots])
+        outputs = self._prim_min[slots] + (values - data_min) / self._data_diff[slots] * self._prim_diff[slots]
+
+        skipped = len(slots) - np.count_nonzero(in_bounds)
+        if skipped > 0:
+            carb.log_info(f'{type(self).__name__}: {skipped} values outside data bounds')
+        slots = slots[in_bounds]
+        outputs = outputs[in_bounds]
+        timestamps = np.asarray(timestamps, dtype=np.float64)[in_bounds]
+        self._applied[slots] = True
+
+        # Animate over the interval since the previous sample. The first sample, and samples older than
+        # the previous one as when history playback goes back, are applied at once.
+        durations = np.minimum(timestamps - self._sample_time[slots], self._max_duration)
+        self._sample_time[slots] = timestamps
+        animated = (self._modes[slots] != HOLD) & (durations > 0)
+
+        held = slots[~animated]
+        held_outputs = outputs[~animated]
+        self._output[held] = held_outputs
+        self._target[held] = held_outputs
+        self._velocity[held] = 0
+        self._animating[held] = False
+        for slot, output in zip(held.tolist(), held_outputs.tolist()):
+            self._apply(slot, output)
+
+        moving = slots[animated]
+        if len(moving) > 0:
+            self._start[moving] = self._output[moving]
+            self._target[moving] = outputs[animated]
+            self._start_time[moving] = now
+            self._duration[moving] = durations[animated]
+            self._animating[moving] = True
+            self._any_animating = True
+
+    def animate(self, now):
+        dt = 0 if self._last_animate_time is None else min(now - self._last_animate_time, MAX_ANIMATION_STEP)
+        self._last_animate_time = now
+        if not self._any_animating:
+            return
+        slots = np.flatnonzero(self._animating[:self._size])
+        outputs = self._output[slots]
+        targets = self._target[slots]
+        modes = self._modes[slots]
+        done = np.zeros(len(slots), dtype=bool)
+
+        linear = modes == LINEAR
+        if linear.any():
+            s = slots[linear]
+            outputs[linear], done[linear] = lerp(self._start[s], targets[linear], self._start_time[s],
+                                                 self._duration[s], now)
+        damped = modes == DAMPED
+        if damped.any():
+            s = slots[damped]
+            outputs[damped], self._velocity[s] = smooth_damp(outputs[damped], targets[damped], self._velocity[s],
+                                                             self._duration[s] * DAMPED_SMOOTH_TIME_RATIO, dt)
+            tolerance = SETTLE_TOLERANCE * np.abs(self._prim_diff[s])
+            done[damped] = (np.abs(targets[damped] - outputs[damped]) <= tolerance) & \
+                (np.abs(self._velocity[s]) <= tolerance)
+
+        # Finished animations end exactly on their target
+        outputs[done] = targets[done]
+        self._velocity[slots[done]] = 0
+        self._animating[slots[done]] = False
+        self._any_animating = not done.all()
+
+        moved = outputs != self._output[slots]
+        self._output[slots] = outputs
+        for slot, output in zip(slots[moved].tolist(), outputs[moved].tolist()):
+            self._apply(slot, output)
+
+
+class ScalerWidgets(_BoundedWidgetGroup):
+    """ModelScaler prims, the z scale follows the property value"""
+    PRIM_MIN = 0
+    PRIM_MAX = 1
+
+    def _get_attribute(self, prim):
+        attribute = prim.GetAttribute('xformOp:scale')
+        scale = attribute.Get()
+        return attribute, scale if scale is not None else Gf.Vec3f(1.0, 1.0, 1.0)
+
+    def _apply(self, slot, output):
+        default = self._defaults[slot]
+        self._runtime_layer.set(self._attribute_paths[slot], self._type_names[slot],
+                                Gf.Vec3f(default[0], default[1], output))
+
+
+class MotionIndicatorWidgets(_BoundedWidgetGroup):
+    """MotionIndicator prims, the speed of the conveyor/conveyor_speed shader follows the property value"""
+    PRIM_MIN = 0
+    PRIM_MAX = -0.06
+
+    def _get_attribute(self, prim):
+        attribute = get_prim(f'{prim.GetPath()}/Conveyor/conveyor_speed').GetAttribute('inputs:value')
+        speed = attribute.Get()
+        return attribute, speed if speed is not None else 0
+
+    def _apply(self, slot, output):
+        self._runtime_layer.set(self._attribute_paths[slot], self._type_names[slot], output)
+
+
+class ShaderWidgets(_WidgetGroup):
+    """
+    ModelShader prims, bound to the material of the first matched rule expression: the variant of their material
+    with the rule color from the material pool, or the material of the rule. Prims with the same rules share one
+    compiled rule set of the rule engine, evaluated for all their slots at once.
+    """
+    ARRAYS = _WidgetGroup.ARRAYS + ('_matched', '_rule_set_ids')
+
+    def __init__(self, runtime_layer, material_pool):
+        self._material_pool = material_pool
+        # (rule set id, base material path) -> material path of each rule
+        self._rule_materials_cache = dict()
+        super().__init__(runtime_layer)
+
+    def _init_arrays(self, capacity):
+        self._rule_engine = RuleEngine()
+        self._rule_set_ids = np.zeros(capacity, dtype=np.int32)
+        # Index of the last applied rule of each slot
+        self._matched = np.full(capacity, NO_MATCH, dtype=np.int32)
+        # Material bound by each rule of the slot, None to restore the authored material
+        self._rule_materials = [None] * capacity
+        self._binding_paths = [None] * capacity
+
+    def _grow(self):
+        super()._grow()
+        self._rule_materials += [None] * (self._capacity - len(self._rule_materials))
+        self._binding_paths += [None] * (self._capacity - len(self._binding_paths))
+
+    def _set(self, slot, prim):
+        material_targets = prim.GetRelationship('material:binding').GetTargets()
+        if len(material_targets) == 0:
+            raise Exception('ModelShader attached to prim without a material binding')
+        rule_set_id = self._rule_engine.compile(get_rule_exp_list_from_prim(prim),
+                                                prim.GetAttribute(MAT_COLOR_ATTR).Get(),
+                                                prim.GetAttribute(CHANGE_MAT_PATH).Get())
+        # Variants of the rule colors are created when the prim is bound, not when a rule first matches
+        base_path = material_targets[0]
+        materials = self._rule_materials_cache.get((rule_set_id, base_path))
+        if materials is None:
+            materials = tuple(self._material_pool.get_variant(base_path, color) if color is not None else material_path
+                              for color, material_path in self._rule_engine.get(rule_set_id).targets)
+            self._rule_materials_cache[(rule_set_id, base_path)] = materials
+        self._rule_set_ids[slot] = rule_set_id
+        self._rule_materials[slot] = materials
+        self._binding_paths[slot] = prim.GetPath().AppendProperty('material:binding')
+        self._matched[slot] = NO_MATCH
+
+    def update(self, slots, values, timestamps, now):
+        matched = self._rule_engine.evaluate(self._rule_set_ids[slots], values)
+        # A value matching no rule keeps the last applied rule, the same rule is not applied twice
+        changed = (matched != NO_MATCH) & (matched != self._matched[slots])
+        for slot, i in zip(slots[changed].tolist(), matched[changed].tolist()):
+            material_path = self._rule_materials[slot][i]
+            if material_path is None:
+                self._reset(slot)
+            else:
+                self._runtime_layer.set_target(self._binding_paths[slot], material_path)
+            self._matched[slot] = i
+            self._applied[slot] = True
+
+    # Back to the authored material
+    def _reset(self, slot):
+        self._runtime_layer.clear(self._binding_paths[slot])
+        self._matched[slot] = NO_MATCH
+
+
+class WidgetSystem:
+    """
+    Updates all the prims bound to ModelShader, ModelScaler and MotionIndicator widgets from one app update
+    subscription. On every update only the prims whose data binding changed are evaluated, in one NumPy pass
+    per widget type, so the per frame cost follows the number of changed values instead of the number of prims.
+    The values of a frame are written to the runtime layer in one change block, the layer is removed on stop.
+    """
+    __instance: WidgetSystem = None
+
+    @classmethod
+    def get_instance(cls) -> WidgetSystem:
+        if cls.__instance is None:
+            cls.__instance = WidgetSystem()
+        return cls.__instance
+
+    def __init__(self):
+        self._groups = dict()
+        self._runtime_layer = None
+        self._material_pool = None
+        self._store = None
+        self._subscription_handle = None
+        # prim path -> (group, slot, store subscription)
+        self._entries = dict()
+        # data binding -> [(group, slot)]
+        self._databinding_slots = dict()
+        # Data bindings changed since the last update
+        self._pending_changes = set()
+
+    @property
+    def is_running(self):
+        return self._store is not None
+
+    def _ensure_started(self, stage=None):
+        if self._store is not None:
+            return
+        self._runtime_layer = RuntimeLayer(stage or omni.usd.get_context().get_stage())
+        self._material_pool = MaterialPool(self._runtime_layer)
+        self._groups = {
+            'ModelShader': ShaderWidgets(self._runtime_layer, self._material_pool),
+            'ModelScaler': ScalerWidgets(self._runtime_layer),
+            'MotionIndicator': MotionIndicatorWidgets(self._runtime_layer)
+        }
+        self._store = DataBindingStore.get_instance()
+        self._store.add_change_listener(self._on_changes)
+        self._subscription_handle = omni.kit.app.get_app() \
+            .get_update_event_stream().create_subscription_to_pop(self._on_update, name='TWINMAKER_WIDGETS')
+
+    def start(self, stage):
+        """Register every prim of the stage bound to a widget and update them until stop"""
+        self._ensure_started(stage)
+        for prim in stage.Traverse():
+            widget = get_widget_from_prim(prim)
+            if widget:
+                self.register(prim, widget)
+        self._flush()
+        carb.log_info(f'widget system started with {len(self._entries)} bound prims, '
+                      f'{len(self._material_pool)} material variants')
+
+    def stop(self):
+        """Unsubscribe every bound prim and restore the authored values by removing the runtime layer"""
+        if self._store is None:
+            return
+        self._runtime_layer.destroy()
+        self._runtime_layer = None
+        self._material_pool = None
+        self._groups = dict()
+        for _, _, subscription in self._entries.values():
+            self._store.unsubscribe(subscription)
+        self._store.remove_change_listener(self._on_changes)
+        self._store = None
+        self._subscription_handle = None
+        self._entries = dict()
+        self._databinding_slots = dict()
+        self._pending_changes = set()
+        carb.log_info('widget system stopped')
+
+    def register(self, prim, widget):
+        """Bind a prim to a widget, registering a prim twice has no effect"""
+        prim_path = str(prim.GetPath())
+        if prim_path in self._entries:
+            return
+        self._ensure_started()
+        group = self._groups.get(widget)
+        if group is None:
+            carb.log_warn(f'unsupported widget {widget} on {prim_path}')
+            return
+        try:
+            slot = group.add(prim)
+        except Exception as e:
+            carb.log_error(f'failed to bind {prim_path} to {widget}, error: {e}')
+            return
+        databinding = get_data_binding_from_prim(prim)
+        subscription = self._store.subscribe(databinding, get_poll_interval_from_prim(prim))
+        self._entries[prim_path] = (group, slot, subscription)
+        self._databinding_slots.setdefault(databinding, []).append((group, slot))
+        omni.usd.get_context().set_pickable(prim_path, True)
+        # Show the current value on the next update
+        if databinding in self._store.get_snapshot().datapoints:
+            self._pending_changes.add(databinding)
+
+    def unregister(self, prim_path):
+        entry = self._entries.pop(str(prim_path), None)
+        if entry is None:
+            return
+        group, slot, subscription = entry
+        # Restored on the next flush, with the other edits of the frame
+        group.reset([slot])
+        group.remove(slot)
+        slots = self._databinding_slots.get(subscription.databinding, [])
+        if (group, slot) in slots:
+            slots.remove((group, slot))
+        if len(slots) == 0:
+            self._databinding_slots.pop(subscription.databinding, None)
+        self._store.unsubscribe(subscription)
+
+    # Define the new material variants before writing the bindings to them
+    def _flush(self):
+        self._material_pool.flush()
+        self._runtime_layer.flush()
+
+    def _on_changes(self, databindings):
+        self._pending_changes.update(databindings)
+
+    @profiled('TwinMaker::WidgetSystem._on_update')
+    def _on_update(self, e):
+        if self._store is None:
+            return
+        update_start = time.perf_counter()
+        now = time.monotonic()
+        if len(self._pending_changes) > 0:
+            self._update_changed(now)
+        for group in self._groups.values():
+            try:
+                group.animate(now)
+            except Exception as error:
+                carb.log_error(f'failed to animate {type(group).__name__}, error: {error}')
+        self._flush()
+        get_metrics().observe('twinmaker_widget_update_seconds', 'Time spent in widget updates per frame',
+                              time.perf_counter() - update_start, buckets=FRAME_BUCKETS)
+
+    def _update_changed(self, now):
+        changes, self._pending_changes = self._pending_changes, set()
+        datapoints = self._store.get_snapshot().datapoints
+        # group -> ([slot], [value], [timestamp])
+        batches = dict()
+        for d in changes:
+            slots = self._databinding_slots.get(d)
+            datapoint = datapoints.get(d)
+            if slots is None or datapoint is None:
+                continue
+            for group, slot in slots:
+                batch = batches.get(group)
+                if batch is None:
+                    batch = batches[group] = ([], [], [])
+                batch[0].append(slot)
+                batch[1].append(datapoint.value)
+                batch[2].append(datapoint.timestamp)
+        for group, (slots, values, timestamps) in batches.items():
+            try:
+                group.update(np.array(slots, dtype=np.intp), values, timestamps, now)
+            except Exception as e:
+                carb.log_error(f'failed to update {type(group).__name__}, error: {e}')
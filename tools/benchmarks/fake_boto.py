@@ -0,0 +1,148 @@
+"""
+Stand-in for boto3 and botocore serving synthetic IoT TwinMaker and S3 responses, so the data path can be
+benchmarked without AWS. Every entity has the components and properties given to FakeTwinMakerClient, and every
+property has one sample per sample_period seconds.
+"""
+from datetime import datetime, timezone
+import math
+import sys
+import types
+
+
+def _parse_time(value):
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    date = datetime.fromisoformat(value)
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date.timestamp()
+
+
+def _format_time(t):
+    return datetime.fromtimestamp(t, timezone.utc).replace(tzinfo=None).isoformat() + 'Z'
+
+
+class FakeTwinMakerClient:
+    def __init__(self, components=None, sample_period=1.0):
+        self.components = components or {'component': {'value': 'DOUBLE', 'status': 'STRING'}}
+        self.sample_period = sample_period
+        self.calls = 0
+
+    def get_entity(self, workspaceId, entityId):
+        self.calls += 1
+        return {
+            'entityId': entityId,
+            'components': {
+                component_name: {
+                    'properties': {
+                        name: {'definition': {'dataType': {'type': data_type}}} for name, data_type in properties.items()
+                    }
+                } for component_name, properties in self.components.items()
+            }
+        }
+
+    def get_property_value_history(self, workspaceId, entityId, componentName, selectedProperties, startTime, endTime,
+                                   orderByTime='ASCENDING', maxResults=100, nextToken=None):
+        self.calls += 1
+        start = math.ceil(_parse_time(startTime) / self.sample_period)
+        end = math.floor(_parse_time(endTime) / self.sample_period)
+        offset = int(nextToken) if nextToken else 0
+        indices = list(range(end, start - 1, -1) if orderByTime == 'DESCENDING' else range(start, end + 1))
+        page = indices[offset:offset + maxResults]
+        properties = self.components.get(componentName, {})
+
+        property_values = []
+        for name in selectedProperties:
+            data_type = properties.get(name, 'DOUBLE')
+            values = []
+            for i in page:
+                if data_type == 'STRING':
+                    value = {'stringValue': 'ACTIVE' if i % 7 == 0 else 'NORMAL'}
+                else:
+                    value = {'doubleValue': float((i * 37) % 100)}
+                values.append({'time': _format_time(i * self.sample_period), 'value': value})
+            property_values.append({
+                'entityPropertyReference': {'entityId': entityId, 'componentName': componentName, 'propertyName': name},
+                'values': values
+            })
+        result = {'propertyValues': property_values}
+        if offset + maxResults < len(indices):
+            result['nextToken'] = str(offset + maxResults)
+        return result
+
+    def get_workspace(self, workspaceId):
+        self.calls += 1
+        return {'s3Location': f'arn:aws:s3:::{workspaceId.lower()}-bucket'}
+
+
+class FakeS3Client:
+    def download_file(self, bucket, key, filename):
+        pass
+
+
+class FakeSession:
+    clients = {}
+
+    def __init__(self, region_name=None, botocore_session=None):
+        self.region_name = region_name
+
+    def client(self, service_name, region_name=None, config=None, **kwargs):
+        if service_name not in FakeSession.clients:
+            FakeSession.clients[service_name] = FakeTwinMakerClient() if service_name == 'iottwinmaker' \
+                else FakeS3Client()
+        return FakeSession.clients[service_name]
+
+
+class _Config:
+    def __init__(self, **kwargs):
+        self.options = kwargs
+
+
+class _CredentialProvider:
+    def __init__(self, session=None):
+        self.session = session
+
+
+class _CredentialResolver:
+    def __init__(self, providers):
+        self.providers = providers
+
+
+class _DeferredRefreshableCredentials:
+    def __init__(self, refresh_using, method):
+        self.method = method
+
+
+class _BotocoreSession:
+    def __init__(self):
+        self.components = dict()
+
+    def register_component(self, name, component):
+        self.components[name] = component
+
+
+def install():
+    """Register the boto3 and botocore stand-ins in sys.modules"""
+    boto3 = types.ModuleType('boto3')
+    boto3.Session = FakeSession
+    boto3.client = lambda service_name, **kwargs: FakeSession().client(service_name)
+    botocore = types.ModuleType('botocore')
+    botocore.__path__ = []
+    botocore_session = types.ModuleType('botocore.session')
+    botocore_session.get_session = _BotocoreSession
+    botocore_config = types.ModuleType('botocore.config')
+    botocore_config.Config = _Config
+    botocore_credentials = types.ModuleType('botocore.credentials')
+    botocore_credentials.CredentialProvider = _CredentialProvider
+    botocore_credentials.CredentialResolver = _CredentialResolver
+    botocore_credentials.DeferredRefreshableCredentials = _DeferredRefreshableCredentials
+    botocore.session = botocore_session
+    botocore.config = botocore_config
+    botocore.credentials = botocore_credentials
+    sys.modules.update({
+        'boto3': boto3,
+        'botocore': botocore,
+        'botocore.session': botocore_session,
+        'botocore.config': botocore_config,
+        'botocore.credentials': botocore_credentials
+    })
@@ -0,0 +1,249 @@
+"""
+Headless micro-benchmarks of the extension logic: rule evaluation, data bounds, data binding hashing,
+data type conversion, scene hierarchy paths and the fetch worker scheduling loop. Kit modules are replaced by
+the stand-ins of stubs.py and AWS by fake_boto.py, so they run with a plain Python interpreter with NumPy.
+
+    python tools/benchmarks/run_benchmarks.py [--filter rules] [--repeat 5] [--json results.json]
+                                              [--baseline baseline.json] [--tolerance 0.1]
+
+Each benchmark reports the best time of its repeats, its throughput, and the peak and retained memory
+allocated by one run, measured with tracemalloc in a separate run.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_boto
+import stubs
+
+SETTINGS_PATH = '/exts/omni.iot.twinmaker'
+stubs.install({
+    f'{SETTINGS_PATH}/persistentCache/enabled': False,
+    f'{SETTINGS_PATH}/polling/adaptive': False
+})
+fake_boto.install()
+
+from omni.iot.twinmaker.data_models import DataBinding, DataBounds, RuleExpression
+from omni.iot.twinmaker.utils.twinmaker_utils import evaluate_rule, apply_operator, convert_data_type
+from omni.iot.twinmaker.scene_importer import SceneImporter
+from omni.iot.twinmaker.rules import RuleEngine
+from omni.iot.twinmaker.metadata import EntityMetadataCache
+from omni.iot.twinmaker.request_scheduler import RequestScheduler
+from omni.iot.twinmaker.store import DataFetchingWorker, SubscriptionHandle
+from omni.iot.twinmaker.twinmaker_api import TwinMaker
+
+BENCHMARKS = dict()
+
+
+def benchmark(name, ops):
+    """Register a benchmark, the decorated function builds its inputs and returns the function to measure"""
+    def decorator(setup):
+        BENCHMARKS[name] = (setup, ops)
+        return setup
+    return decorator
+
+
+@benchmark('evaluate_rule', 100000)
+def bench_evaluate_rule():
+    rules = [RuleExpression('value', op, val) for op, val in [('<', 10), ('<', 30), ('==', 50), ('<', 70), ('>=', 70)]]
+    values = [float((i * 37) % 100) for i in range(100000)]
+
+    def run():
+        for value in values:
+            evaluate_rule(rules, value)
+    return run
+
+
+@benchmark('rule_engine_batch', 100000)
+def bench_rule_engine_batch():
+    # Alarm colouring scene: 100k prims sharing 20 rule sets, one batch per frame
+    engine = RuleEngine()
+    rule_set_ids = []
+    for i in range(20):
+        rules = [RuleExpression('value', op, val + i) for op, val in [('<', 10), ('<', 30), ('==', 50), ('<', 70), ('>=', 70)]]
+        rule_set_ids.append(engine.compile(rules, ['#00FF00', 'NONE', '#0000FF', 'NONE', '#FF0000'], ['NONE'] * 5))
+    ids = np.array([rule_set_ids[i % 20] for i in range(100000)])
+    values = [float((i * 37) % 100) for i in range(100000)]
+
+    def run():
+        engine.evaluate(ids, values)
+    return run
+
+
+@benchmark('apply_operator', 100000)
+def bench_apply_operator():
+    operators = ['==', '>', '<', '>=', '<=']
+    cases = [(float(i % 100), operators[i % 5], 50.0) for i in range(100000)]
+
+    def run():
+        for left, op, right in cases:
+            apply_operator(left, op, right)
+    return run
+
+
+@benchmark('bounds_normalize', 100000)
+def bench_bounds_normalize():
+    bounds = DataBounds(0, 100, 0, 1)
+    values = [float((i * 37) % 110) for i in range(100000)]
+
+    def run():
+        for value in values:
+            bounds.normalize(value)
+    return run
+
+
+@benchmark('databinding_hash', 100000)
+def bench_databinding_hash():
+    bindings = [DataBinding(f'entity{i // 10}', 'component', f'property{i % 10}') for i in range(10000)]
+    store = {d: i for i, d in enumerate(bindings)}
+    # Lookups with equal but distinct objects, as the widget scripts build their own data bindings
+    lookups = [DataBinding(f'entity{(i * 7) % 1000}', 'component', f'property{i % 10}') for i in range(100000)]
+
+    def run():
+        for d in lookups:
+            store.get(d)
+    return run
+
+
+@benchmark('convert_data_type', 100000)
+def bench_convert_data_type():
+    types = ['STRING', 'DOUBLE', 'BOOLEAN', 'INTEGER', 'LONG']
+    cases = [types[i % 5] for i in range(100000)]
+
+    def run():
+        for data_type in cases:
+            convert_data_type(data_type)
+    return run
+
+
+def _build_scene(node_count, children_per_node=8):
+    nodes = [{'name': f'node{i}', 'components': []} for i in range(node_count)]
+    for i in range(node_count):
+        children = [c for c in range(i * children_per_node + 1, (i + 1) * children_per_node + 1) if c < node_count]
+        if len(children) > 0:
+            nodes[i]['children'] = children
+    return {'nodes': nodes}
+
+
+@benchmark('scene_reference_paths', 5000)
+def bench_scene_reference_paths():
+    # No AWS call, only the hierarchy logic
+    importer = SceneImporter.__new__(SceneImporter)
+    importer._scene_json = _build_scene(5000)
+
+    def run():
+        for i in range(5000):
+            importer._SceneImporter__generate_reference_path(i)
+    return run
+
+
+@benchmark('worker_fetch_cycle', 1000)
+def bench_worker_fetch_cycle():
+    client = fake_boto.FakeTwinMakerClient({'component': {f'property{i}': 'DOUBLE' for i in range(10)}})
+    fake_boto.FakeSession.clients['iottwinmaker'] = client
+    data_source = TwinMaker('us-west-2', None, 'benchmark')
+    requests = RequestScheduler(rate=1e9, burst=1e9)
+    metadata = EntityMetadataCache(data_source, request_scheduler=requests)
+    worker = DataFetchingWorker(1.0, data_source, metadata, request_scheduler=requests)
+    bindings = [DataBinding(f'entity{i // 10}', 'component', f'property{i % 10}') for i in range(1000)]
+    metadata.load({d.entity_id for d in bindings})
+    for d in bindings:
+        worker.add_subscription(SubscriptionHandle(d))
+    loop = asyncio.new_event_loop()
+
+    # One fetch cycle of every subscribed data binding, including the fake API response parsing
+    def run():
+        for schedule in worker._scheduler._schedules.values():
+            schedule.next_due = 0
+        worker._watermarks.clear()
+        loop.run_until_complete(worker._async_fetch_data())
+        worker._dispatch_changes()
+    return run
+
+
+def measure(name, repeat):
+    setup, ops = BENCHMARKS[name]
+    run = setup()
+    run()
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    run()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(times)
+    return {
+        'name': name,
+        'ops': ops,
+        'best_s': best,
+        'mean_s': sum(times) / len(times),
+        'ops_per_s': ops / best,
+        'peak_kib': peak / 1024,
+        'retained_kib': retained / 1024,
+        'peak_bytes_per_op': peak / ops
+    }
+
+
+def compare(results, baseline, tolerance):
+    baseline_results = {r['name']: r for r in baseline}
+    regressions = []
+    for result in results:
+        reference = baseline_results.get(result['name'])
+        if reference is None:
+            continue
+        change = result['ops_per_s'] / reference['ops_per_s'] - 1
+        if change < -tolerance:
+            regressions.append(f'{result["name"]}: {result["ops_per_s"]:.0f} ops/s vs baseline '
+                               f'{reference["ops_per_s"]:.0f} ({change:+.1%})')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless micro-benchmarks of omni.iot.twinmaker')
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this text')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--baseline', help='results file to compare throughput with')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='allowed throughput loss, 0.1 is 10%%')
+    args = parser.parse_args()
+
+    results = []
+    print(f'{"benchmark":<24}{"ops/s":>14}{"best ms":>10}{"peak KiB":>11}{"B/op":>8}')
+    for name in BENCHMARKS:
+        if args.filter not in name:
+            continue
+        result = measure(name, args.repeat)
+        results.append(result)
+        print(f'{name:<24}{result["ops_per_s"]:>14.0f}{result["best_s"] * 1000:>10.2f}'
+              f'{result["peak_kib"]:>11.1f}{result["peak_bytes_per_op"]:>8.1f}')
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if len(regressions) > 0:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""
+Lightweight stand-ins for the Kit modules (carb, omni.*, pxr) imported by the extension, so its pure logic can be
+imported and benchmarked with a plain Python interpreter. carb logging, settings, profiler and tokens behave like
+no-op or in-memory versions, pxr.Gf vectors are tuples, and every other Kit name resolves to a permissive stub.
+"""
+import importlib.abc
+import importlib.machinery
+import os
+import sys
+import types
+
+EXTENSION_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'exts', 'omni.iot.twinmaker'))
+
+# Modules replaced by stubs, with their submodules. omni itself stays a namespace package for omni.iot.twinmaker.
+STUBBED_PREFIXES = ('carb', 'pxr', 'omni.kit', 'omni.usd', 'omni.ui', 'omni.timeline', 'omni.ext', 'omni.services',
+                    'fastapi', 'pydantic')
+
+
+class _StubType(type):
+    def __getattr__(cls, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return Stub()
+
+
+class Stub(metaclass=_StubType):
+    """Accepts any call, attribute or item access, and can be subclassed or used as a decorator"""
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __call__(self, *args, **kwargs):
+        return Stub()
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return Stub()
+
+    def __getitem__(self, key):
+        return Stub()
+
+    def __bool__(self):
+        return False
+
+    def __iter__(self):
+        return iter(())
+
+
+class StubModule(types.ModuleType):
+    def __init__(self, name):
+        super().__init__(name)
+        self.__path__ = []
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        # Classes, so module attributes can be used as base classes
+        stub = type(name, (Stub,), {})
+        setattr(self, name, stub)
+        return stub
+
+
+class _StubFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    def find_spec(self, fullname, path, target=None):
+        if any(fullname == p or fullname.startswith(p + '.') for p in STUBBED_PREFIXES):
+            return importlib.machinery.ModuleSpec(fullname, self, is_package=True)
+        return None
+
+    def create_module(self, spec):
+        return sys.modules.get(spec.name) or StubModule(spec.name)
+
+    def exec_module(self, module):
+        pass
+
+
+class Settings:
+    def __init__(self):
+        self._values = dict()
+
+    def get(self, path):
+        return self._values.get(path)
+
+    def get_as_int(self, path):
+        return int(self._values.get(path) or 0)
+
+    def set(self, path, value):
+        self._values[path] = value
+
+    def subscribe_to_node_change_events(self, path, callback):
+        return None
+
+
+_settings = Settings()
+
+
+def _install_carb():
+    carb = StubModule('carb')
+    for name in ('log_verbose', 'log_info', 'log_warn', 'log_error'):
+        setattr(carb, name, lambda *args, **kwargs: None)
+
+    settings = StubModule('carb.settings')
+    settings.get_settings = lambda: _settings
+    profiler = StubModule('carb.profiler')
+    profiler.begin = lambda mask, name: None
+    profiler.end = lambda mask: None
+    tokens = StubModule('carb.tokens')
+    tokens.get_tokens_interface = lambda: types.SimpleNamespace(resolve=lambda path: path)
+    events = StubModule('carb.events')
+
+    carb.settings = settings
+    carb.profiler = profiler
+    carb.tokens = tokens
+    carb.events = events
+    sys.modules.update({'carb': carb, 'carb.settings': settings, 'carb.profiler': profiler, 'carb.tokens': tokens,
+                        'carb.events': events})
+
+
+class Vec3f(tuple):
+    def __new__(cls, x=0.0, y=0.0, z=0.0):
+        return super().__new__(cls, (float(x), float(y), float(z)))
+
+
+def _install_pxr():
+    pxr = StubModule('pxr')
+    gf = StubModule('pxr.Gf')
+    gf.Vec3f = Vec3f
+    gf.Vec3d = Vec3f
+    pxr.Gf = gf
+    sys.modules.update({'pxr': pxr, 'pxr.Gf': gf})
+
+
+def install(settings=None):
+    """
+    Register the stand-ins and make omni.iot.twinmaker importable. settings are initial carb settings values,
+    for example {'/exts/omni.iot.twinmaker/persistentCache/enabled': False}.
+    """
+    if EXTENSION_PATH not in sys.path:
+        sys.path.insert(0, EXTENSION_PATH)
+    if not any(isinstance(f, _StubFinder) for f in sys.meta_path):
+        sys.meta_path.insert(0, _StubFinder())
+    _install_carb()
+    _install_pxr()
+    for path, value in (settings or {}).items():
+        _settings.set(path, value)
+    return _settings